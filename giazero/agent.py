@@ -1,13 +1,23 @@
 import argparse
+import asyncio
+import sys
+import uuid
+import weakref
 from copy import copy
 from pathlib import Path
 
 from dotenv import load_dotenv
+from file_index import start_file_index
 from langchain.agents import create_agent
 from langchain.agents.middleware import SummarizationMiddleware, TodoListMiddleware
+from langchain.chat_models import init_chat_model
 from langchain.messages import HumanMessage
-from system_prompt import get_system_prompt
-from tools import tools
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from llm_cache import SQLiteLLMCache
+from middleware import OrderedGuiToolsMiddleware, TaskStateMiddleware
+from payload_cache import payload_cache
+from recording import TraceRecorder
 
 load_dotenv(override=True)
 
@@ -25,6 +35,175 @@ def pprint(msg):
     msg.pretty_print()
 
 
+def state_dir(solution_dir: Path) -> Path:
+    """Directory for a run's checkpoints and job output, next to solution_dir.
+
+    Kept out of solution_dir so deliverables listings and file change reports
+    do not include files the framework rewrites on every step.
+    """
+    return solution_dir.parent / f".{solution_dir.name}.giazero"
+
+
+def build_middleware(model, gui_tool_names: list[str] | None = None) -> list:
+    """The agent's middleware, shared by build_agent and replays."""
+    return [
+        TodoListMiddleware(),
+        OrderedGuiToolsMiddleware(gui_tool_names),
+        SummarizationMiddleware(
+            model=model,
+            trigger=("fraction", 0.75),
+            keep=("fraction", 0.25),
+        ),
+    ]
+
+
+def build_agent(
+    task_dir: Path,
+    solution_dir: Path,
+    model: str,
+    checkpointer=None,
+    llm_cache: Path | None = None,
+    trace: Path | None = None,
+):
+    """Create an agent that solves the task in task_dir, writing to solution_dir.
+
+    With a checkpointer, the agent's state (messages and todo list) is saved
+    after every step so an interrupted run can be resumed. With llm_cache, the
+    path of an SQLite file, model responses (including summaries) are cached
+    and identical requests are answered from it. With trace, model responses
+    and tool results are recorded there for replay.py.
+
+    Job output directory and file indexes belong to this agent, so several
+    agents can run in one process; the indexes stop when the agent is garbage
+    collected.
+    """
+    # Imported here rather than at module level so replay.py can import this
+    # module on machines without a display, where importing pyautogui fails
+    from gui_tools import gui_tools
+    from system_prompt import get_system_prompt
+    from tools import tools
+
+    cache = SQLiteLLMCache(llm_cache) if llm_cache is not None else None
+    model = init_chat_model(model, cache=cache)
+    system_prompt = get_system_prompt(task_dir=task_dir, solution_dir=solution_dir)
+    # Created now so the index watches the agent's outputs from the start
+    solution_dir.mkdir(parents=True, exist_ok=True)
+    indexes = start_file_index(task_dir, solution_dir)
+    gui_tool_names = [t.name for t in gui_tools]
+    task_state = TaskStateMiddleware(state_dir(solution_dir) / "jobs", indexes)
+
+    agent = create_agent(
+        model=model,
+        tools=tools,
+        system_prompt=system_prompt,
+        checkpointer=checkpointer,
+        middleware=[
+            task_state,
+            *build_middleware(model, gui_tool_names),
+        ],
+    )
+    if trace is not None:
+        recorder = TraceRecorder(
+            trace, system_prompt, tools, gui_tool_names, model.profile
+        )
+        agent = agent.with_config(callbacks=[recorder])
+    weakref.finalize(agent, task_state.close)
+    return agent
+
+
+def _run_args(user_prompt: str | None, max_parallel_tools: int, run_id: str | None):
+    config = {"max_concurrency": max_parallel_tools}
+    if run_id is not None:
+        config["configurable"] = {"thread_id": run_id}
+    if user_prompt is None:
+        return None, config
+    return {"messages": [HumanMessage(content=user_prompt)]}, config
+
+
+def run_agent(
+    agent,
+    user_prompt: str | None,
+    max_parallel_tools: int = 8,
+    run_id: str | None = None,
+):
+    """Run the agent to completion, printing each message as it arrives.
+
+    For an agent with a checkpointer, run_id identifies the run; with
+    user_prompt=None, the run continues from its last checkpoint.
+    """
+    inputs, config = _run_args(user_prompt, max_parallel_tools, run_id)
+    for event in agent.stream(inputs, config, stream_mode="values"):
+        pprint(event["messages"][-1])
+
+
+async def arun_agent(
+    agent,
+    user_prompt: str | None,
+    max_parallel_tools: int = 8,
+    run_id: str | None = None,
+):
+    """Async version of run_agent.
+
+    Shell and Python tools await their processes instead of blocking a thread,
+    so many agents can run concurrently on one event loop.
+    """
+    inputs, config = _run_args(user_prompt, max_parallel_tools, run_id)
+    async for event in agent.astream(inputs, config, stream_mode="values"):
+        pprint(event["messages"][-1])
+
+
+def _resume_error(state, run_id: str, user_prompt: str | None) -> str | None:
+    """Return why a run cannot be resumed, given its saved state snapshot."""
+    if not state.values:
+        return f"No saved run with id '{run_id}'."
+    if user_prompt is None and not state.next:
+        return (
+            f"Run '{run_id}' already finished; pass --user-prompt to continue it "
+            "with a new message."
+        )
+    return None
+
+
+def main(args, task_dir: Path, solution_dir: Path, checkpoint_db: Path, run_id: str):
+    user_prompt = args.user_prompt
+    with SqliteSaver.from_conn_string(str(checkpoint_db)) as checkpointer:
+        agent = build_agent(
+            task_dir,
+            solution_dir,
+            args.model,
+            checkpointer,
+            args.llm_cache,
+            args.record,
+        )
+        if args.resume:
+            state = agent.get_state({"configurable": {"thread_id": run_id}})
+            if error := _resume_error(state, run_id, user_prompt):
+                sys.exit(f"Error: {error}")
+        run_agent(agent, user_prompt, args.max_parallel_tools, run_id)
+        print(f"Payload cache: {payload_cache.stats()}", file=sys.stderr)
+
+
+async def amain(
+    args, task_dir: Path, solution_dir: Path, checkpoint_db: Path, run_id: str
+):
+    user_prompt = args.user_prompt
+    async with AsyncSqliteSaver.from_conn_string(str(checkpoint_db)) as checkpointer:
+        agent = build_agent(
+            task_dir,
+            solution_dir,
+            args.model,
+            checkpointer,
+            args.llm_cache,
+            args.record,
+        )
+        if args.resume:
+            state = await agent.aget_state({"configurable": {"thread_id": run_id}})
+            if error := _resume_error(state, run_id, user_prompt):
+                sys.exit(f"Error: {error}")
+        await arun_agent(agent, user_prompt, args.max_parallel_tools, run_id)
+        print(f"Payload cache: {payload_cache.stats()}", file=sys.stderr)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the agent to solve a task.")
     parser.add_argument(
@@ -48,32 +227,66 @@ if __name__ == "__main__":
     parser.add_argument(
         "--user-prompt",
         type=str,
-        default="Solve the challenge.",
-        help="Initial user prompt to send to the agent (default: 'Solve the challenge.').",
+        default=None,
+        help="Initial user prompt to send to the agent (default: 'Solve the challenge.'). "
+        "With --resume, sent as a new message after the saved conversation.",
+    )
+    parser.add_argument(
+        "--max-parallel-tools",
+        type=int,
+        default=8,
+        help="Maximum number of tool calls from one model turn run concurrently "
+        "(default: 8). GUI tools always run one at a time, in order.",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the agent on an asyncio event loop (agent.astream).",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Continue a previous run from its last completed step.",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        type=Path,
+        default=None,
+        help="SQLite file where run state is saved "
+        "(default: .<solution-dir name>.giazero/checkpoints.sqlite next to the "
+        "solution directory).",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=Path,
+        default=None,
+        help="SQLite file caching model responses; identical requests are "
+        "answered from it (default: no caching).",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        help="Trace file recording model responses and tool results, for "
+        "offline replay with replay.py.",
     )
     args = parser.parse_args()
 
     task_dir = args.task_dir.resolve()
     solution_dir = args.solution_dir.resolve()
 
-    system_prompt = get_system_prompt(task_dir=task_dir, solution_dir=solution_dir)
-
-    agent = create_agent(
-        model=args.model,
-        tools=tools,
-        system_prompt=system_prompt,
-        middleware=[
-            TodoListMiddleware(),
-            SummarizationMiddleware(
-                model=args.model,
-                trigger=("fraction", 0.75),
-                keep=("fraction", 0.25),
-            ),
-        ],
-    )
+    if args.record and args.resume:
+        parser.error("--record needs a fresh run; it cannot be used with --resume.")
+    if args.user_prompt is None and not args.resume:
+        args.user_prompt = "Solve the challenge."
+    checkpoint_db = args.checkpoint_db or state_dir(solution_dir) / "checkpoints.sqlite"
+    checkpoint_db.parent.mkdir(parents=True, exist_ok=True)
+    run_id = args.resume or uuid.uuid4().hex[:12]
+    print(f"Run id: {run_id} (resume with --resume {run_id})")
 
-    for event in agent.stream(
-        {"messages": [HumanMessage(content=args.user_prompt)]},
-        stream_mode="values",
-    ):
-        pprint(event["messages"][-1])
+    if args.use_async:
+        asyncio.run(amain(args, task_dir, solution_dir, checkpoint_db, run_id))
+    else:
+        main(args, task_dir, solution_dir, checkpoint_db, run_id)
@@ -0,0 +1,359 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+
+# Seconds a worker gets to clean up (kill its jobs and sessions) after SIGTERM
+# before it is killed
+WORKER_SHUTDOWN_GRACE = 10.0
+
+
+def _reset_task_state():
+    """Release per-task state so the next task starts clean in this process."""
+    from file_index import stop_file_index
+    from job_tools import kill_all_jobs
+    from session_tools import close_all_sessions
+
+    kill_all_jobs(everywhere=True)
+    close_all_sessions(everywhere=True)
+    stop_file_index()
+
+
+def _redirect_output(path: Path):
+    """Send this process's stdout and stderr (including child processes) to a file."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+
+
+def _worker_main(
+    conn,
+    model: str,
+    user_prompt: str,
+    max_parallel_tools: int,
+    llm_cache: Path | None,
+):
+    """Run tasks received over conn until told to stop.
+
+    Heavy imports happen once per worker, not once per task.
+    """
+    # Exit via SystemExit so atexit handlers kill jobs and close sessions
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    from agent import build_agent, run_agent
+
+    conn.send({"status": "ready"})
+    while (task := conn.recv()) is not None:
+        task_dir, solution_dir, attempt = Path(task[0]), Path(task[1]), task[2]
+        solution_dir.mkdir(parents=True, exist_ok=True)
+        _redirect_output(solution_dir / "agent.log")
+        print(f"=== Attempt {attempt} at {time.strftime('%Y-%m-%d %H:%M:%S')} ===")
+        try:
+            agent = build_agent(task_dir, solution_dir, model, llm_cache=llm_cache)
+            run_agent(agent, user_prompt, max_parallel_tools)
+            conn.send({"status": "ok"})
+        except Exception as e:
+            conn.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+        finally:
+            _reset_task_state()
+
+
+class Worker:
+    """A process running tasks one at a time, replaced if it hangs or dies."""
+
+    def __init__(self, context, args: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.proc = context.Process(target=_worker_main, args=(child_conn, *args))
+        self.proc.start()
+        child_conn.close()
+        self.ready = False
+        self.task = None
+        self.started = None
+
+    def assign(self, task: dict):
+        self.task = task
+        self.started = time.monotonic()
+        self.conn.send((task["task_dir"], task["solution_dir"], task["attempts"]))
+
+    def stop(self, force: bool = False):
+        if not force:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        else:
+            self.proc.terminate()
+        self.proc.join(WORKER_SHUTDOWN_GRACE)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+
+def find_tasks(patterns: list[str], manifest: Path | None) -> list[Path]:
+    """Task directories matching the globs, plus those listed in the manifest.
+
+    The manifest has one directory per line; blank lines and lines starting
+    with "#" are skipped, and relative paths are relative to the manifest.
+    """
+    tasks = []
+    for pattern in patterns:
+        tasks.extend(Path(p) for p in sorted(glob.glob(pattern)))
+    if manifest is not None:
+        for line in manifest.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                tasks.append(manifest.parent / line)
+    unique = {}
+    for task in tasks:
+        if task.is_dir():
+            unique.setdefault(task.resolve(), None)
+    return list(unique)
+
+
+def _solution_dir_names(tasks: list[Path]) -> list[str]:
+    """Directory names for the tasks' solutions: the task name, made unique."""
+    names = []
+    seen = {}
+    for task in tasks:
+        name = task.name
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}-{seen[name]}")
+    return names
+
+
+def _set_aside(solution_dir: Path, output_dir: Path, attempt: int):
+    """Move a failed attempt's outputs out of the way so a retry starts clean.
+
+    The attempt's state directory (job logs) moves along with it, next to the
+    set-aside solution directory.
+    """
+    from agent import state_dir
+
+    target = output_dir / ".failed-attempts" / f"{solution_dir.name}.attempt-{attempt}"
+    for source, dest in (
+        (solution_dir, target),
+        (state_dir(solution_dir), state_dir(target)),
+    ):
+        if not source.exists():
+            continue
+        if dest.exists():
+            shutil.rmtree(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        source.rename(dest)
+
+
+def run_batch(
+    tasks: list[Path],
+    output_dir: Path,
+    model: str,
+    user_prompt: str,
+    workers: int = 4,
+    timeout: float | None = None,
+    retries: int = 0,
+    max_parallel_tools: int = 8,
+    llm_cache: Path | None = None,
+) -> list[dict]:
+    """Run the agent on every task across a pool of worker processes.
+
+    Each task writes to its own solution directory under output_dir. A task
+    that fails, times out or crashes its worker is retried up to retries times,
+    in an emptied solution directory; the failed attempt's directory is moved
+    to output_dir/.failed-attempts.
+    With llm_cache, all workers share one model response cache.
+
+    Returns:
+        One result dict per task, in task order.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = [
+        {
+            "task_dir": str(task),
+            "solution_dir": str(output_dir / name),
+            "status": "pending",
+            "attempts": 0,
+            "duration": 0.0,
+            "error": None,
+        }
+        for task, name in zip(tasks, _solution_dir_names(tasks))
+    ]
+    pending = list(results)
+    context = multiprocessing.get_context("spawn")
+    worker_args = (model, user_prompt, max_parallel_tools, llm_cache)
+    pool = [Worker(context, worker_args) for _ in range(min(workers, len(tasks)))]
+
+    def finish(worker: Worker, status: str, error: str | None):
+        task = worker.task
+        task["duration"] += time.monotonic() - worker.started
+        task["status"] = status
+        task["error"] = error
+        worker.task = None
+        if status != "ok" and task["attempts"] <= retries:
+            _set_aside(Path(task["solution_dir"]), output_dir, task["attempts"])
+            pending.append(task)
+        print(
+            f"{task['task_dir']}: {status} (attempt {task['attempts']})"
+            + (f" - {error}" if error else ""),
+            flush=True,
+        )
+
+    try:
+        while pending or any(w.task for w in pool):
+            for worker in pool:
+                if worker.ready and worker.task is None and pending:
+                    task = pending.pop(0)
+                    task["attempts"] += 1
+                    task["status"] = "running"
+                    worker.assign(task)
+
+            ready = wait(
+                [w.conn for w in pool] + [w.proc.sentinel for w in pool], timeout=1.0
+            )
+            for i, worker in enumerate(pool):
+                if worker.conn in ready:
+                    try:
+                        message = worker.conn.recv()
+                        if message["status"] == "ready":
+                            worker.ready = True
+                        else:
+                            finish(worker, message["status"], message.get("error"))
+                        continue
+                    except (EOFError, OSError):
+                        pass
+                if worker.proc.is_alive() and (
+                    worker.task is None
+                    or timeout is None
+                    or time.monotonic() - worker.started <= timeout
+                ):
+                    continue
+                if not worker.ready:
+                    # Would fail the same way every time; its traceback is on stderr
+                    raise RuntimeError(
+                        f"Worker failed to start (exit code {worker.proc.exitcode})."
+                    )
+                if worker.task is None:
+                    pass  # Died while idle; nothing to retry
+                elif not worker.proc.is_alive():
+                    finish(worker, "crashed", f"exit code {worker.proc.exitcode}")
+                else:
+                    worker.stop(force=True)
+                    finish(worker, "timeout", f"exceeded {timeout} seconds")
+                # The worker is gone; replace it
+                worker.conn.close()
+                pool[i] = Worker(context, worker_args)
+    finally:
+        for worker in pool:
+            worker.stop(force=worker.task is not None)
+
+    report_path = output_dir / "report.json"
+    report_path.write_text(json.dumps(results, indent=2))
+    return results
+
+
+def _print_summary(results: list[dict], report_path: Path):
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    total_time = sum(r["duration"] for r in results)
+    print(
+        f"\n{len(results)} tasks: " + ", ".join(f"{n} {s}" for s, n in counts.items())
+    )
+    print(f"Total agent time: {total_time:.0f}s. Report: {report_path}")
+    for result in results:
+        if result["status"] != "ok":
+            print(f"  {result['status']:<8} {result['task_dir']}: {result['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the agent on many tasks.")
+    parser.add_argument(
+        "--tasks",
+        nargs="*",
+        default=[],
+        help="Glob patterns of task directories (e.g. 'tasks/*').",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="File listing task directories, one per line.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        required=True,
+        help="Directory receiving one solution directory per task and report.json.",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="google_genai:gemini-3-pro-preview",
+        help="Model name to use (default: google_genai:gemini-3-pro-preview).",
+    )
+    parser.add_argument(
+        "--user-prompt",
+        type=str,
+        default="Solve the challenge.",
+        help="Initial user prompt sent for every task (default: 'Solve the challenge.').",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of tasks run at the same time (default: 4). Tasks using GUI "
+        "tools share one display, so run them with --workers 1.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds after which a task is stopped (default: no limit).",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Times a failed, crashed or timed out task is retried (default: 0).",
+    )
+    parser.add_argument(
+        "--max-parallel-tools",
+        type=int,
+        default=8,
+        help="Maximum number of tool calls from one model turn run concurrently "
+        "(default: 8).",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=Path,
+        default=None,
+        help="SQLite file caching model responses, shared by all workers "
+        "(default: no caching).",
+    )
+    args = parser.parse_args()
+
+    tasks = find_tasks(args.tasks, args.manifest)
+    if not tasks:
+        parser.error("No task directories found; pass --tasks and/or --manifest.")
+
+    output_dir = args.output_dir.resolve()
+    results = run_batch(
+        tasks,
+        output_dir,
+        model=args.model,
+        user_prompt=args.user_prompt,
+        workers=args.workers,
+        timeout=args.timeout,
+        retries=args.retries,
+        max_parallel_tools=args.max_parallel_tools,
+        llm_cache=args.llm_cache.resolve() if args.llm_cache else None,
+    )
+    _print_summary(results, output_dir / "report.json")
+    sys.exit(0 if all(r["status"] == "ok" for r in results) else 1)
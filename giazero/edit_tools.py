@@ -0,0 +1,372 @@
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from langchain.tools import tool
+
+# Hunks that do not apply at their stated line are searched for up to this many
+# lines away
+MAX_HUNK_OFFSET = 1000
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False):
+    """Replace a file's contents atomically via a temporary file and rename.
+
+    Readers see either the old or the new contents, never a partial write.
+    The file's permissions are kept; parent directories are created.
+
+    Args:
+        path: File to write.
+        data: New contents.
+        fsync: Flush the data and the rename to disk before returning, so the
+               write survives a crash or power loss.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _read_text(path: Path) -> str:
+    """Read a file as UTF-8 text, keeping its line endings."""
+    try:
+        return path.read_bytes().decode("utf-8")
+    except UnicodeDecodeError:
+        raise ValueError(f"'{path}' is not a UTF-8 text file.") from None
+
+
+def _split_lines(text: str) -> list[str]:
+    """Split text into lines, keeping their ends.
+
+    Unlike str.splitlines, only "\n" ends a line (as in read_text_file), so
+    characters such as form feeds stay part of their line.
+    """
+    return [line for line in re.split(r"(?<=\n)", text) if line]
+
+
+def _line_ending(text: str) -> str:
+    first = text.find("\n")
+    return "\r\n" if first > 0 and text[first - 1] == "\r" else "\n"
+
+
+@tool
+def replace_in_file(
+    file_path: str, old_string: str, new_string: str, replace_all: bool = False
+) -> str:
+    """Edit a file by replacing an exact string with another.
+
+    Much cheaper than rewriting a whole file with write_file. old_string must
+    match the file exactly, including whitespace and indentation, and must be
+    unique unless replace_all is set; include surrounding lines to make it so.
+
+    Args:
+        file_path: Path to the file to edit (relative or absolute).
+        old_string: Exact text to replace.
+        new_string: Replacement text.
+        replace_all: Replace every occurrence instead of requiring exactly one.
+
+    Returns:
+        The number of replacements and the line where the first one starts, or
+        an error message.
+    """
+    try:
+        resolved_path = Path(file_path).resolve()
+
+        if not resolved_path.is_file():
+            return f"Error: File '{file_path}' does not exist."
+        if not old_string:
+            return "Error: old_string must not be empty."
+
+        text = _read_text(resolved_path)
+        if old_string not in text and _line_ending(text) == "\r\n":
+            # Models write "\n"; match files with Windows line endings too
+            old_string = old_string.replace("\r\n", "\n").replace("\n", "\r\n")
+            new_string = new_string.replace("\r\n", "\n").replace("\n", "\r\n")
+
+        count = text.count(old_string)
+        if count == 0:
+            return (
+                f"Error: old_string not found in '{file_path}'. Check whitespace "
+                "and indentation with read_text_file."
+            )
+        if count > 1 and not replace_all:
+            return (
+                f"Error: old_string occurs {count} times in '{file_path}'. Include "
+                "more surrounding context to make it unique, or set replace_all=True."
+            )
+
+        line = text.count("\n", 0, text.index(old_string)) + 1
+        text = text.replace(old_string, new_string)
+        atomic_write(resolved_path, text.encode("utf-8"))
+        return (
+            f"Replaced {count} occurrence(s) in '{file_path}', starting at line {line}."
+        )
+
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except PermissionError:
+        return f"Error: Permission denied to write to '{file_path}'."
+    except Exception as e:
+        return f"Error editing file: {str(e)}"
+
+
+@tool
+def replace_lines(file_path: str, start_line: int, end_line: int, content: str) -> str:
+    """Edit a file by replacing a range of lines.
+
+    Line numbers are 1-based and inclusive, as shown by read_text_file. To
+    insert without removing anything, set end_line to start_line - 1 (e.g.
+    start_line=1, end_line=0 inserts at the top). To delete lines, pass an
+    empty content.
+
+    Args:
+        file_path: Path to the file to edit (relative or absolute).
+        start_line: First line to replace.
+        end_line: Last line to replace.
+        content: Text to put in place of the lines.
+
+    Returns:
+        Success message with the new line count, or an error message.
+    """
+    try:
+        resolved_path = Path(file_path).resolve()
+
+        if not resolved_path.is_file():
+            return f"Error: File '{file_path}' does not exist."
+
+        text = _read_text(resolved_path)
+        lines = _split_lines(text)
+        if start_line < 1 or start_line > len(lines) + 1:
+            return f"Error: start_line must be between 1 and {len(lines) + 1}."
+        if end_line < start_line - 1 or end_line > len(lines):
+            return f"Error: end_line must be between {start_line - 1} and {len(lines)}."
+
+        eol = _line_ending(text)
+        new_lines = [line.rstrip("\r\n") + eol for line in _split_lines(content)]
+        if new_lines and not content.endswith("\n") and end_line == len(lines):
+            # Replacing the end of the file: keep its final newline, or lack of it
+            if not text.endswith("\n"):
+                new_lines[-1] = new_lines[-1].rstrip("\r\n")
+        if start_line > len(lines) and lines and not lines[-1].endswith("\n"):
+            lines[-1] += eol
+
+        lines[start_line - 1 : end_line] = new_lines
+        atomic_write(resolved_path, "".join(lines).encode("utf-8"))
+        return (
+            f"Replaced lines {start_line}-{end_line} of '{file_path}' with "
+            f"{len(new_lines)} line(s); the file now has {len(lines)} lines."
+        )
+
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except PermissionError:
+        return f"Error: Permission denied to write to '{file_path}'."
+    except Exception as e:
+        return f"Error editing file: {str(e)}"
+
+
+class _FilePatch:
+    def __init__(self, old_path: str | None, new_path: str | None):
+        self.old_path = old_path  # None for created files
+        self.new_path = new_path  # None for deleted files
+        self.hunks = []  # (old_start, old_lines, new_lines, new_has_eol)
+
+
+def _patch_paths(old_header: str, new_header: str) -> tuple[str | None, str | None]:
+    """Paths from the "---" and "+++" lines; None for /dev/null.
+
+    git's "a/" and "b/" prefixes are removed.
+    """
+    old, new = (h[4:].split("\t")[0].strip() for h in (old_header, new_header))
+    if (old == "/dev/null" or old.startswith("a/")) and (
+        new == "/dev/null" or new.startswith("b/")
+    ):
+        old, new = (p if p == "/dev/null" else p[2:] for p in (old, new))
+    return (None if old == "/dev/null" else old, None if new == "/dev/null" else new)
+
+
+def _parse_patch(patch: str) -> list[_FilePatch]:
+    """Parse a unified diff (as made by diff -u or git diff) into file patches."""
+    files = []
+    lines = [line.rstrip("\n").removesuffix("\r") for line in _split_lines(patch)]
+    i = 0
+    while i < len(lines):
+        if not (lines[i].startswith("--- ") and i + 1 < len(lines)):
+            i += 1
+            continue
+        if not lines[i + 1].startswith("+++ "):
+            raise ValueError(f"Expected '+++' header after line {i + 1}.")
+        file_patch = _FilePatch(*_patch_paths(lines[i], lines[i + 1]))
+        files.append(file_patch)
+        i += 2
+
+        while i < len(lines) and lines[i].startswith("@@"):
+            match = _HUNK_HEADER.match(lines[i])
+            if match is None:
+                raise ValueError(f"Malformed hunk header: {lines[i]}")
+            old_count = int(match.group(2) or 1)
+            new_count = int(match.group(4) or 1)
+            old_lines, new_lines, new_has_eol = [], [], True
+            i += 1
+            while i < len(lines) and (
+                old_count > len(old_lines) or new_count > len(new_lines)
+            ):
+                line = lines[i]
+                op, text = (line[:1], line[1:]) if line else (" ", "")
+                if op == " ":
+                    old_lines.append(text)
+                    new_lines.append(text)
+                elif op == "-":
+                    old_lines.append(text)
+                elif op == "+":
+                    new_lines.append(text)
+                elif op != "\\":
+                    raise ValueError(f"Unexpected line in hunk: {line}")
+                i += 1
+            if len(old_lines) != old_count or len(new_lines) != new_count:
+                raise ValueError(f"Hunk at line {match.group(0)} is truncated.")
+            if i < len(lines) and lines[i].startswith("\\"):
+                # "\ No newline at end of file" after the last new-side line
+                new_has_eol = not new_count or lines[i - 1][:1] == "-"
+                i += 1
+            file_patch.hunks.append(
+                (int(match.group(1)), old_lines, new_lines, new_has_eol)
+            )
+    if not files:
+        raise ValueError("No file headers ('--- a/file', '+++ b/file') found in patch.")
+    return files
+
+
+def _find_hunk(lines: list[str], old_lines: list[str], expected: int) -> int | None:
+    """Find where old_lines occur in lines, nearest to expected first.
+
+    Tries an exact match, then one ignoring trailing whitespace.
+    """
+    for normalize in (lambda s: s.rstrip("\r\n"), lambda s: s.rstrip()):
+        target = [normalize(line) for line in old_lines]
+        for offset in range(MAX_HUNK_OFFSET + 1):
+            for start in {expected - offset, expected + offset}:
+                if 0 <= start <= len(lines) - len(target) and all(
+                    normalize(lines[start + k]) == target[k] for k in range(len(target))
+                ):
+                    return start
+    return None
+
+
+def _apply_hunks(text: str, file_patch: _FilePatch) -> str:
+    lines = _split_lines(text)
+    eol = _line_ending(text)
+    shift = 0
+    for old_start, old_lines, new_lines, new_has_eol in file_patch.hunks:
+        # A zero-length old side is given as the line before the insertion
+        expected = old_start - 1 + shift if old_lines else old_start + shift
+        start = _find_hunk(lines, old_lines, max(0, expected))
+        if start is None:
+            context = "\n".join(old_lines[:5])
+            raise ValueError(
+                f"Hunk @@ -{old_start} does not apply to '{file_patch.old_path}'. "
+                f"Expected lines:\n{context}"
+            )
+        replacement = [line + eol for line in new_lines]
+        at_end = start + len(old_lines) == len(lines)
+        if replacement and at_end and not new_has_eol:
+            replacement[-1] = new_lines[-1]
+        lines[start : start + len(old_lines)] = replacement
+        shift += len(new_lines) - len(old_lines)
+    return "".join(lines)
+
+
+@tool
+def apply_patch(patch: str, base_dir: str = ".") -> str:
+    """Apply a unified diff to one or more files.
+
+    Accepts the format produced by diff -u and git diff. Hunks that moved are
+    found by searching near their stated line, so line numbers need not be
+    exact, but context and removed lines must match the file. Files are
+    created or deleted when one side is /dev/null. Nothing is written unless
+    every hunk applies.
+
+    Args:
+        patch: The unified diff text.
+        base_dir: Directory that paths in the patch are relative to. Defaults to ".".
+
+    Returns:
+        A summary of the changed files, or an error message.
+    """
+    try:
+        base = Path(base_dir).resolve()
+        results = []
+        for file_patch in _parse_patch(patch):
+            target = base / (file_patch.new_path or file_patch.old_path)
+            if file_patch.old_path is None:
+                if target.exists():
+                    return f"Error: Cannot create '{target}': it already exists."
+                text = ""
+            else:
+                source = base / file_patch.old_path
+                if not source.is_file():
+                    return f"Error: File '{source}' does not exist."
+                text = _read_text(source)
+            new_text = _apply_hunks(text, file_patch)
+            results.append((file_patch, target, new_text))
+
+        summary = []
+        for file_patch, target, new_text in results:
+            if file_patch.new_path is None:
+                target.unlink()
+                summary.append(f"deleted {target}")
+                continue
+            atomic_write(target, new_text.encode("utf-8"))
+            if file_patch.old_path is None:
+                summary.append(f"created {target}")
+            else:
+                if file_patch.old_path != file_patch.new_path:
+                    (base / file_patch.old_path).unlink()
+                summary.append(f"patched {target} ({len(file_patch.hunks)} hunks)")
+        return "Applied patch: " + ", ".join(summary) + "."
+
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except PermissionError as e:
+        return f"Error: Permission denied: {str(e)}"
+    except Exception as e:
+        return f"Error applying patch: {str(e)}"
+
+
+edit_tools = [
+    replace_in_file,
+    replace_lines,
+    apply_patch,
+]
@@ -0,0 +1,509 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator
+
+from file_walker import ALWAYS_SKIP_DIRS, Entry, GitignoreRules, glob_to_regex, walk
+from langchain.tools import tool
+
+# Files larger than this are not hashed; changes to them are judged by size and
+# mtime alone
+INDEX_HASH_MAX_SIZE = 16 * 1024 * 1024
+# Most changed paths listed by get_file_changes
+MAX_CHANGES_LISTED = 200
+
+# inotify event masks (see inotify(7))
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+if sys.platform.startswith("linux"):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        _libc = None
+    if _libc is not None and not hasattr(_libc, "inotify_init1"):
+        _libc = None
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=20)
+        ).hexdigest()
+
+
+class FileIndex:
+    """In-memory index of the files under a directory, kept current with inotify.
+
+    Watcher events only mark paths as dirty; they are re-examined (stat, and
+    rehash for previously hashed files) the next time the index is queried, so
+    bursts of writes cost little. Paths ignored by .gitignore files and the
+    insides of .git are not indexed, matching file_walker.walk. Where inotify
+    is unavailable (not Linux, or out of watches) every query rescans the tree.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self.entries = {}  # Relative path -> Entry
+        self.digests = {}  # Relative path -> (size, mtime, content hash)
+        self.changes = {}  # Relative path -> "added", "modified" or "deleted"
+        self._sorted = None
+        self._rules = {}
+        self._dirty = set()
+        self._rescan_needed = False
+        self._lock = threading.Lock()
+        self._fd = None  # inotify descriptor; None when polling
+        self._closed = False
+        self._watches = {}  # Watch descriptor -> relative directory path
+
+        for entry in walk(self.root, with_stat=True):
+            self.entries[entry.path] = entry
+        self._start_watching()
+
+    # Ignore rules
+
+    def _load_rules(self, rel_dir: str) -> GitignoreRules | None:
+        if rel_dir not in self._rules:
+            self._rules[rel_dir] = GitignoreRules.load(self.root / rel_dir, rel_dir)
+        return self._rules[rel_dir]
+
+    def _ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether walk() would skip rel_path, including via one of its parents."""
+        parts = rel_path.split("/")
+        if any(part in ALWAYS_SKIP_DIRS for part in parts[:-1]):
+            return True
+        rules = []
+        for depth in range(len(parts)):
+            rel_dir = "/".join(parts[:depth])
+            ruleset = self._load_rules(rel_dir)
+            if ruleset is not None:
+                rules.append(ruleset)
+            prefix = "/".join(parts[: depth + 1])
+            prefix_is_dir = is_dir or depth < len(parts) - 1
+            for ruleset in reversed(rules):
+                result = ruleset.match(prefix, prefix_is_dir)
+                if result is not None:
+                    if result:
+                        return True
+                    break
+        return False
+
+    # Watching
+
+    def _start_watching(self):
+        if _libc is None:
+            return
+        fd = _libc.inotify_init1(_IN_CLOEXEC)
+        if fd < 0:
+            return
+        self._fd = fd
+        self._watch_tree("")
+        if self._fd is not None:
+            threading.Thread(target=self._read_events, args=(fd,), daemon=True).start()
+
+    def _fall_back_to_polling(self):
+        for wd in self._watches:
+            _libc.inotify_rm_watch(self._fd, wd)
+        self._watches.clear()
+        # The descriptor is left open: the reader thread may be blocked on it,
+        # and closing it would let a new file reuse the number under the thread
+        self._fd = None
+
+    def _watch_tree(self, rel_dir: str):
+        """Watch rel_dir and its indexed subdirectories, or poll if out of watches.
+
+        Re-adding an existing watch is harmless; it keeps its descriptor.
+        """
+        dirs = [rel_dir] + [
+            rel_path
+            for rel_path, entry in list(self.entries.items())
+            if entry.is_dir
+            and (not rel_dir or rel_path.startswith(rel_dir + "/"))
+            and rel_path.rsplit("/", 1)[-1] not in ALWAYS_SKIP_DIRS
+            and not (self.root / rel_path).is_symlink()
+        ]
+        for rel_path in dirs:
+            path = os.fsencode(self.root / rel_path)
+            wd = _libc.inotify_add_watch(self._fd, path, _WATCH_MASK)
+            if wd < 0:
+                if ctypes.get_errno() == 28:  # ENOSPC: watch limit reached
+                    self._fall_back_to_polling()
+                    return
+                continue
+            self._watches[wd] = rel_path
+
+    def _read_events(self, fd: int):
+        while True:
+            try:
+                data = os.read(fd, 64 * 1024)
+            except OSError:
+                return
+            if not data:
+                return
+            with self._lock:
+                if self._closed:
+                    # close() removed the watches, which woke this read; the
+                    # descriptor can only be closed safely here
+                    os.close(fd)
+                    return
+                self._handle_events(data)
+
+    def close(self):
+        """Stop watching the tree."""
+        with self._lock:
+            self._closed = True
+            if self._fd is not None:
+                self._fall_back_to_polling()
+
+    def _handle_events(self, data: bytes):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                self._rescan_needed = True
+                continue
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if not name:
+                # Events on the watched directory itself; its parent reports them
+                continue
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if name == ".gitignore":
+                self._rescan_needed = True
+            if mask & _IN_ISDIR and mask & _IN_MOVED_FROM:
+                prefix = rel_path + "/"
+                for stale_wd, watched in list(self._watches.items()):
+                    if watched == rel_path or watched.startswith(prefix):
+                        _libc.inotify_rm_watch(self._fd, stale_wd)
+                        del self._watches[stale_wd]
+            self._dirty.add(rel_path)
+
+    # Updating
+
+    def _record(self, rel_path: str, kind: str):
+        previous = self.changes.get(rel_path)
+        if previous == "added" and kind == "deleted":
+            del self.changes[rel_path]
+        elif previous == "added":
+            pass
+        elif previous == "deleted" and kind == "added":
+            self.changes[rel_path] = "modified"
+        else:
+            self.changes[rel_path] = kind
+
+    def _set(self, entry: Entry):
+        old = self.entries.get(entry.path)
+        self.entries[entry.path] = entry
+        if old is None:
+            self._record(entry.path, "added")
+            self._sorted = None
+        elif not entry.is_dir and (old.size, old.mtime) != (entry.size, entry.mtime):
+            if self._content_changed(entry):
+                self._record(entry.path, "modified")
+
+    def _remove(self, rel_path: str):
+        prefix = rel_path + "/"
+        for path in [p for p in self.entries if p == rel_path or p.startswith(prefix)]:
+            del self.entries[path]
+            self.digests.pop(path, None)
+            self._record(path, "deleted")
+            self._sorted = None
+
+    def _content_changed(self, entry: Entry) -> bool:
+        """Compare against the stored hash, if there is one; touches are not changes."""
+        known = self.digests.pop(entry.path, None)
+        if known is None or entry.size != known[0]:
+            return True
+        try:
+            digest = _file_digest(self.root / entry.path)
+        except OSError:
+            return True
+        self.digests[entry.path] = (entry.size, entry.mtime, digest)
+        return digest != known[2]
+
+    def _update(self, rel_path: str):
+        path = self.root / rel_path
+        try:
+            stat = path.lstat()
+        except OSError:
+            self._remove(rel_path)
+            return
+        is_dir = path.is_dir()
+        if self._ignored(rel_path, is_dir):
+            self._remove(rel_path)
+            return
+        old = self.entries.get(rel_path)
+        if old is not None and old.is_dir != is_dir:
+            self._remove(rel_path)
+        self._set(Entry(rel_path, is_dir, stat.st_size, stat.st_mtime))
+        if (
+            is_dir
+            and old is None
+            and not path.is_symlink()
+            and path.name not in ALWAYS_SKIP_DIRS
+        ):
+            # A new or moved-in directory: index what it already contains, then
+            # watch it (contents changing in between are caught by the walk)
+            for entry in walk(path, with_stat=True):
+                child = f"{rel_path}/{entry.path}"
+                if not self._ignored(child, entry.is_dir):
+                    self._set(entry._replace(path=child))
+            if self._fd is not None:
+                self._watch_tree(rel_path)
+
+    def _rescan(self):
+        """Rebuild from a full walk, recording differences as changes."""
+        self._rules.clear()
+        current = {entry.path: entry for entry in walk(self.root, with_stat=True)}
+        for rel_path in [p for p in self.entries if p not in current]:
+            self._remove(rel_path)
+        for entry in current.values():
+            self._set(entry)
+        if self._fd is not None:
+            self._watch_tree("")
+
+    def sync(self):
+        """Apply pending watcher events (or rescan when not watching)."""
+        with self._lock:
+            if self._fd is None or self._rescan_needed:
+                self._rescan_needed = False
+                self._dirty.clear()
+                self._rescan()
+                return
+            dirty, self._dirty = self._dirty, set()
+            for rel_path in sorted(dirty):
+                self._update(rel_path)
+
+    # Queries
+
+    def walk(
+        self,
+        directory: Path,
+        max_depth: int | None = None,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+    ) -> Iterator[Entry]:
+        """Same results as file_walker.walk(directory, ..., with_stat=True), from memory.
+
+        Directories the index does not descend into (ignored ones, or those in
+        ALWAYS_SKIP_DIRS) are walked on disk instead.
+        """
+        self.sync()
+        base = Path(directory).resolve().relative_to(self.root).as_posix()
+        base = "" if base == "." else base
+        if base and not self._descended(base):
+            yield from walk(directory, max_depth, include, exclude, with_stat=True)
+            return
+        include_res = [glob_to_regex(p) for p in include or []]
+        exclude_res = [glob_to_regex(p) for p in exclude or []]
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(self.entries, key=lambda p: p.split("/"))
+            paths = self._sorted
+            entries = self.entries
+
+        prefix = base + "/" if base else ""
+        for rel_path in paths:
+            if not rel_path.startswith(prefix):
+                continue
+            path = rel_path[len(prefix) :]
+            parts = path.split("/")
+            if max_depth is not None and len(parts) > max_depth:
+                continue
+            if any(
+                r.fullmatch("/".join(parts[: i + 1]))
+                for r in exclude_res
+                for i in range(len(parts))
+            ):
+                continue
+            entry = entries.get(rel_path)
+            if entry is None:
+                continue
+            if include_res and (
+                entry.is_dir or not any(r.fullmatch(path) for r in include_res)
+            ):
+                continue
+            yield entry._replace(path=path)
+
+    def _descended(self, rel_dir: str) -> bool:
+        """Whether the contents of the directory rel_dir are in the index."""
+        entry = self.entries.get(rel_dir)
+        return (
+            entry is not None
+            and entry.is_dir
+            and not any(part in ALWAYS_SKIP_DIRS for part in rel_dir.split("/"))
+        )
+
+    def take_changes(self) -> dict[str, str]:
+        """Return and reset the changes recorded since the previous call.
+
+        Changed files are hashed (up to INDEX_HASH_MAX_SIZE) so that a later
+        rewrite with identical content is not reported as a change.
+        """
+        self.sync()
+        with self._lock:
+            changes, self.changes = self.changes, {}
+            for rel_path, kind in changes.items():
+                entry = self.entries.get(rel_path)
+                if kind == "deleted" or entry is None or entry.is_dir:
+                    continue
+                if entry.size > INDEX_HASH_MAX_SIZE:
+                    continue
+                try:
+                    digest = _file_digest(self.root / rel_path)
+                except OSError:
+                    continue
+                self.digests[rel_path] = (entry.size, entry.mtime, digest)
+        return changes
+
+
+_indexes = []
+_indexes_lock = threading.Lock()
+# Indexes whose changes get_file_changes reports; see use_indexes
+_reported_indexes = ContextVar("reported_indexes", default=None)
+
+
+def start_file_index(*roots: Path) -> list[FileIndex]:
+    """Index the given directories; tools then answer walks under them from memory.
+
+    A directory inside another one given is covered by that one's index.
+    Directories indexed by earlier calls (e.g. for another agent in the same
+    process) get a new index, so each caller sees only its own changes.
+
+    Returns:
+        The new indexes.
+    """
+    resolved = {Path(root).resolve() for root in roots}
+    new = []
+    for root in sorted(resolved, key=lambda p: len(p.parts)):
+        if root.is_dir() and not any(
+            index.root == root or index.root in root.parents for index in new
+        ):
+            new.append(FileIndex(root))
+    with _indexes_lock:
+        _indexes.extend(new)
+    return new
+
+
+def stop_file_index(indexes: list[FileIndex] | None = None):
+    """Stop and drop the given indexes (default: all), e.g. when a task is done."""
+    with _indexes_lock:
+        if indexes is None:
+            indexes = list(_indexes)
+        for index in indexes:
+            if index in _indexes:
+                _indexes.remove(index)
+    for index in indexes:
+        index.close()
+
+
+@contextmanager
+def use_indexes(indexes: list[FileIndex]):
+    """Make get_file_changes calls inside this block report only these indexes.
+
+    The indexes are held in a context variable, so agents running
+    concurrently in one process each see only their own changes.
+    """
+    token = _reported_indexes.set(indexes)
+    try:
+        yield
+    finally:
+        _reported_indexes.reset(token)
+
+
+def find_index(path: Path) -> FileIndex | None:
+    """Return the index covering path (the innermost one if roots are nested)."""
+    path = Path(path).resolve()
+    best = None
+    with _indexes_lock:
+        indexes = list(_indexes)
+    for index in indexes:
+        if path == index.root or index.root in path.parents:
+            if best is None or best.root in index.root.parents:
+                best = index
+    return best
+
+
+@tool
+def get_file_changes() -> str:
+    """List files added, modified or deleted in the task and solution directories.
+
+    Reports changes since the previous call (or since the agent started), made
+    by you or by any command or background job. Rewriting a file with
+    identical content is not reported. Paths ignored by .gitignore are not
+    tracked.
+
+    Returns:
+        One line per changed path prefixed with "added", "modified" or
+        "deleted", or a message saying nothing changed.
+    """
+    try:
+        indexes = _reported_indexes.get()
+        if indexes is None:
+            with _indexes_lock:
+                indexes = list(_indexes)
+        if not indexes:
+            return "Error: No directories are being indexed."
+        lines = []
+        for index in indexes:
+            for rel_path, kind in sorted(index.take_changes().items()):
+                entry = index.entries.get(rel_path)
+                suffix = "/" if entry is not None and entry.is_dir else ""
+                lines.append(f"{kind:<8}  {index.root / rel_path}{suffix}")
+        if not lines:
+            return "No changes since the last check."
+        if len(lines) > MAX_CHANGES_LISTED:
+            omitted = len(lines) - MAX_CHANGES_LISTED
+            lines = lines[:MAX_CHANGES_LISTED]
+            lines.append(f"[{omitted} more changes not shown.]")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error getting file changes: {str(e)}"
+
+
+index_tools = [
+    get_file_changes,
+]
@@ -0,0 +1,171 @@
+import os
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+# Directories never descended into by recursive walks
+ALWAYS_SKIP_DIRS = {".git", ".hg", ".svn"}
+
+
+class Entry(NamedTuple):
+    path: str  # Relative to the walk root, with "/" separators
+    is_dir: bool
+    size: int | None
+    mtime: float | None
+
+
+def glob_to_regex(pattern: str) -> re.Pattern:
+    """Compile a gitignore-style glob.
+
+    Patterns without a slash match the last path component at any depth;
+    patterns with a slash match the whole relative path. "**" matches across
+    directories, "*" and "?" do not.
+    """
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex += f"[{body}]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(f"{prefix}{regex}")
+
+
+class GitignoreRules:
+    """Patterns from one .gitignore file, matched against paths relative to its directory."""
+
+    def __init__(self, base: str, lines: list[str]):
+        self.base = base
+        self.rules = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            self.rules.append((glob_to_regex(line), negate, line.endswith("/")))
+
+    @classmethod
+    def load(cls, directory: Path, base: str) -> "GitignoreRules | None":
+        try:
+            with open(
+                directory / ".gitignore", encoding="utf-8", errors="replace"
+            ) as f:
+                return cls(base, f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path: str, is_dir: bool) -> bool | None:
+        """Return True if ignored, False if re-included, None if no rule applies."""
+        if self.base:
+            rel_path = rel_path[len(self.base) + 1 :]
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                result = not negate
+        return result
+
+
+def _is_ignored(rules: list[GitignoreRules], rel_path: str, is_dir: bool) -> bool:
+    # Deeper .gitignore files take precedence over their parents
+    for ruleset in reversed(rules):
+        result = ruleset.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def walk(
+    root: Path,
+    max_depth: int | None = None,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    respect_gitignore: bool = True,
+    with_stat: bool = False,
+) -> Iterator[Entry]:
+    """Walk a directory tree depth-first in sorted order using os.scandir.
+
+    Symlinked directories are listed as directories but not followed.
+
+    Args:
+        root: Directory to walk.
+        max_depth: Deepest level to list (1 lists only the root's entries).
+        include: Globs a file must match to be yielded. Directories are only
+                 yielded when no include globs are given.
+        exclude: Globs of files and directories to skip entirely.
+        respect_gitignore: Skip paths ignored by .gitignore files in the tree.
+        with_stat: Fill in size and mtime (costs a stat call per entry).
+    """
+    include_res = [glob_to_regex(p) for p in include or []]
+    exclude_res = [glob_to_regex(p) for p in exclude or []]
+
+    def visit(directory: Path, rel_dir: str, depth: int, rules: list):
+        if respect_gitignore:
+            ruleset = GitignoreRules.load(directory, rel_dir)
+            if ruleset is not None:
+                rules = rules + [ruleset]
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+                is_link = entry.is_symlink()
+            except OSError:
+                continue
+            if any(r.fullmatch(rel_path) for r in exclude_res):
+                continue
+            if respect_gitignore and rules and _is_ignored(rules, rel_path, is_dir):
+                continue
+
+            if not include_res or (
+                not is_dir and any(r.fullmatch(rel_path) for r in include_res)
+            ):
+                size = mtime = None
+                if with_stat:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                        size, mtime = stat.st_size, stat.st_mtime
+                    except OSError:
+                        pass
+                yield Entry(rel_path, is_dir, size, mtime)
+
+            if (
+                is_dir
+                and not is_link
+                and entry.name not in ALWAYS_SKIP_DIRS
+                and (max_depth is None or depth < max_depth)
+            ):
+                yield from visit(Path(entry.path), rel_path, depth + 1, rules)
+
+    yield from visit(Path(root), "", 1, [])
@@ -1,14 +1,19 @@
-import base64
-import io
+import hashlib
 import platform
+import shutil
 import subprocess
 import threading
+import time
 
 import pyautogui
+from image_utils import downscale, encode_image, fit_size
 from langchain.tools import tool
+from payload_cache import content_key, payload_cache
+from PIL import Image, ImageChops
 
-# Set a pause between PyAutoGUI commands to allow the UI to catch up
-pyautogui.PAUSE = 1.0
+# Short pause after every PyAutoGUI command. Waiting for the UI to catch up is
+# done by _settle, which returns as soon as the screen stops changing.
+pyautogui.PAUSE = 0.05
 # Enable failsafe (moving mouse to corner will abort)
 pyautogui.FAILSAFE = True
 
@@ -18,18 +23,225 @@ gui_lock = threading.Lock()
 # Margin in pixels to keep the mouse away from screen edges (avoids Hot Corners)
 SAFETY_MARGIN = 20
 
+# Screenshot pipeline: frames are downscaled so their longest side is at most
+# SCREENSHOT_MAX_DIM pixels (None keeps the native resolution) and encoded with
+# SCREENSHOT_FORMAT ("png", "jpeg" or "webp"). Mouse tools accept and report
+# coordinates in this downscaled screenshot space.
+SCREENSHOT_MAX_DIM = 1920
+SCREENSHOT_FORMAT = "jpeg"
+SCREENSHOT_QUALITY = 85
+SCREENSHOT_GRAYSCALE = False
+
+# Maximum seconds to wait for the screen to settle after each kind of action
+# (0 disables waiting for that action)
+SETTLE_TIMEOUTS = {
+    "move": 0.5,
+    "click": 2.0,
+    "drag": 2.0,
+    "scroll": 1.0,
+    "type": 1.0,
+    "press": 2.0,
+    "hotkey": 2.0,
+}
+# Seconds between frames sampled while waiting for the screen to settle
+SETTLE_POLL_INTERVAL = 0.1
+# Number of consecutive identical frames that count as a settled screen
+SETTLE_STABLE_FRAMES = 2
+# Downscale factor of the frames hashed while settling; coarse frames ignore
+# tiny changes such as a blinking text cursor
+SETTLE_HASH_REDUCE = 16
+
+# keyboard_type pastes text through the clipboard when it is at least this long
+# (or contains characters that cannot be typed); shorter text is typed
+PASTE_MIN_LENGTH = 32
+# Characters typed per PyAutoGUI call when typing long text
+TYPE_CHUNK_SIZE = 64
+# Commands that read text from stdin into the clipboard, tried in order
+CLIPBOARD_COMMANDS = [
+    ["pbcopy"],
+    ["wl-copy"],
+    ["xclip", "-selection", "clipboard"],
+    ["xsel", "--clipboard", "--input"],
+]
+
+# Longest "wait" action accepted by gui_batch, in seconds
+MAX_BATCH_WAIT = 10.0
+
+# Seconds a captured full-resolution frame can be reused by take_screenshot_region
+SCREENSHOT_CACHE_TTL = 5.0
+# Largest zoom factor accepted by take_screenshot_region
+MAX_REGION_ZOOM = 4.0
+
+# Per-channel difference (0-255) above which a pixel counts as changed in diff mode
+DIFF_THRESHOLD = 16
+# Height in pixels of the horizontal bands scanned for changes in diff mode
+DIFF_BAND_HEIGHT = 32
+# Padding in pixels added around each changed region for context
+DIFF_PADDING = 8
+# Fall back to a full frame when there are more regions or they cover more area
+DIFF_MAX_REGIONS = 8
+DIFF_MAX_AREA_FRACTION = 0.5
+
+# Last frame returned by take_screenshot, used as the reference for diff mode
+_last_frame = None
+# Size of the last screenshot, defining the coordinate space of the mouse tools
+_screenshot_size = None
+# Most recent native-resolution capture and its monotonic timestamp. Cleared by
+# every input action and refilled while waiting for the screen to settle.
+_raw_frame = None
+_raw_frame_time = 0.0
+
+
+def _capture():
+    """Capture the screen at native resolution and cache it. Call with gui_lock held."""
+    global _raw_frame, _raw_frame_time
+    _raw_frame = pyautogui.screenshot().convert("RGB")
+    _raw_frame_time = time.monotonic()
+    return _raw_frame
+
+
+def _invalidate_frame():
+    """Drop the cached capture after an input action. Call with gui_lock held."""
+    global _raw_frame
+    _raw_frame = None
+
+
+def _frame_hash(frame) -> bytes:
+    """Hash a coarse, quantized grayscale thumbnail of a frame."""
+    thumb = frame.reduce(SETTLE_HASH_REDUCE).convert("L").point(lambda p: p >> 4)
+    return hashlib.blake2b(thumb.tobytes(), digest_size=16).digest()
+
+
+def _settle(action: str, timeout: float | None = None) -> float:
+    """Wait until the screen stops changing after an action. Call with gui_lock held.
+
+    Frames are sampled every SETTLE_POLL_INTERVAL seconds until
+    SETTLE_STABLE_FRAMES consecutive frames hash the same or the timeout for the
+    action expires. The last sampled frame stays cached for screenshot tools.
+
+    Args:
+        action: Kind of action performed, used to look up SETTLE_TIMEOUTS.
+        timeout: Optional override of the action's timeout in seconds.
+
+    Returns:
+        Seconds spent waiting.
+    """
+    _invalidate_frame()
+    if timeout is None:
+        timeout = SETTLE_TIMEOUTS.get(action, 0.0)
+    if timeout <= 0:
+        return 0.0
+
+    start = time.monotonic()
+    last_hash, stable = None, 0
+    while True:
+        frame_hash = _frame_hash(_capture())
+        stable = stable + 1 if frame_hash == last_hash else 1
+        last_hash = frame_hash
+        elapsed = time.monotonic() - start
+        if stable >= SETTLE_STABLE_FRAMES or elapsed >= timeout:
+            return elapsed
+        time.sleep(SETTLE_POLL_INTERVAL)
+
+
+def _screenshot_scale() -> tuple[float, float]:
+    """Return the factors converting screenshot coordinates to screen coordinates."""
+    width, height = pyautogui.size()
+    shot_width, shot_height = _screenshot_size or fit_size(
+        (width, height), SCREENSHOT_MAX_DIM
+    )
+    return width / shot_width, height / shot_height
+
+
+def _to_screen(x: int, y: int) -> tuple[int, int]:
+    """Convert screenshot coordinates to screen coordinates."""
+    scale_x, scale_y = _screenshot_scale()
+    return round(x * scale_x), round(y * scale_y)
+
+
+def _to_screenshot(x: int, y: int) -> tuple[int, int]:
+    """Convert screen coordinates to screenshot coordinates."""
+    scale_x, scale_y = _screenshot_scale()
+    return round(x / scale_x), round(y / scale_y)
+
 
 def _clamp_xy(x: int, y: int) -> tuple[int, int, bool]:
-    """Clamp coordinates to be within the safe screen area."""
+    """Convert screenshot coordinates to screen coordinates within the safe area."""
     width, height = pyautogui.size()
+    screen_x, screen_y = _to_screen(x, y)
 
-    safe_x = max(SAFETY_MARGIN, min(x, width - SAFETY_MARGIN))
-    safe_y = max(SAFETY_MARGIN, min(y, height - SAFETY_MARGIN))
+    safe_x = max(SAFETY_MARGIN, min(screen_x, width - SAFETY_MARGIN))
+    safe_y = max(SAFETY_MARGIN, min(screen_y, height - SAFETY_MARGIN))
 
-    was_clamped = (safe_x != x) or (safe_y != y)
+    was_clamped = (safe_x != screen_x) or (safe_y != screen_y)
     return safe_x, safe_y, was_clamped
 
 
+def _image_block(image) -> dict:
+    """Encode a screenshot image with the configured pipeline settings.
+
+    Encoded blocks are cached by pixel content, so an unchanged screen or
+    region is not encoded again.
+    """
+    settings = (SCREENSHOT_FORMAT, SCREENSHOT_QUALITY, SCREENSHOT_GRAYSCALE)
+    cache_key = content_key(image.tobytes(), image.mode, image.size, *settings)
+    block = payload_cache.get(cache_key)
+    if block is None:
+        block = encode_image(
+            image,
+            fmt=SCREENSHOT_FORMAT,
+            quality=SCREENSHOT_QUALITY,
+            grayscale=SCREENSHOT_GRAYSCALE,
+        )
+        payload_cache.put(cache_key, block)
+    return block
+
+
+def _changed_regions(previous, current) -> list[tuple[int, int, int, int]]:
+    """Find bounding boxes (left, top, right, bottom) of areas that differ between frames.
+
+    The change mask is scanned in horizontal bands; each band contributes at most
+    one box, and boxes from neighbouring bands that overlap horizontally are merged.
+    """
+    diff = ImageChops.difference(previous, current)
+    red, green, blue = diff.split()
+    diff = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    mask = diff.point(lambda p: 255 if p > DIFF_THRESHOLD else 0)
+    if mask.getbbox() is None:
+        return []
+
+    width, height = mask.size
+    boxes = []
+    for top in range(0, height, DIFF_BAND_HEIGHT):
+        bottom = min(top + DIFF_BAND_HEIGHT, height)
+        bbox = mask.crop((0, top, width, bottom)).getbbox()
+        if bbox is None:
+            continue
+        box = [bbox[0], top + bbox[1], bbox[2], top + bbox[3]]
+        last = boxes[-1] if boxes else None
+        if (
+            last
+            and box[1] - last[3] <= DIFF_BAND_HEIGHT
+            and box[0] <= last[2]
+            and box[2] >= last[0]
+        ):
+            last[0] = min(last[0], box[0])
+            last[2] = max(last[2], box[2])
+            last[3] = box[3]
+        else:
+            boxes.append(box)
+
+    return [
+        (
+            max(0, left - DIFF_PADDING),
+            max(0, top - DIFF_PADDING),
+            min(width, right + DIFF_PADDING),
+            min(height, bottom + DIFF_PADDING),
+        )
+        for left, top, right, bottom in boxes
+    ]
+
+
 @tool
 def focus_window(app_name: str) -> str:
     """Bring a specific application's window to the front.
@@ -55,49 +267,311 @@ def focus_window(app_name: str) -> str:
         return f"Error focusing application: {str(e)}"
 
 
+def _grab_frame():
+    """Capture a downscaled frame and make it the diff reference. Call with gui_lock held.
+
+    Returns:
+        Tuple of the new frame and the previous reference frame (or None).
+    """
+    global _last_frame, _screenshot_size
+    frame = downscale(_capture(), SCREENSHOT_MAX_DIM)
+    previous, _last_frame = _last_frame, frame
+    _screenshot_size = frame.size
+    return frame, previous
+
+
+def _screenshot_content(frame, previous, diff: bool) -> list:
+    """Build the content blocks for a screenshot, optionally as a diff."""
+    if diff and previous is not None and previous.size == frame.size:
+        regions = _changed_regions(previous, frame)
+        if not regions:
+            return [
+                {"type": "text", "text": "No change since the previous screenshot."}
+            ]
+
+        width, height = frame.size
+        changed_area = sum((r - l) * (b - t) for l, t, r, b in regions)
+        if (
+            len(regions) <= DIFF_MAX_REGIONS
+            and changed_area <= DIFF_MAX_AREA_FRACTION * width * height
+        ):
+            content = [
+                {
+                    "type": "text",
+                    "text": f"Screen changed in {len(regions)} region(s) since the "
+                    "previous screenshot. Each image below is a crop of the screen.",
+                }
+            ]
+            for left, top, right, bottom in regions:
+                content.append(
+                    {
+                        "type": "text",
+                        "text": f"Region from ({left}, {top}) to ({right}, {bottom}):",
+                    }
+                )
+                content.append(_image_block(frame.crop((left, top, right, bottom))))
+            return content
+
+    width, height = frame.size
+    return [
+        {
+            "type": "text",
+            "text": f"Screenshot captured successfully ({width}x{height}).",
+        },
+        _image_block(frame),
+    ]
+
+
+# The helpers below perform a single GUI action, wait for the screen to settle
+# and return a status message. They must be called with gui_lock held; the
+# optional settle argument overrides the action's entry in SETTLE_TIMEOUTS.
+
+
+def _move(x: int, y: int, settle: float | None = None) -> str:
+    safe_x, safe_y, clamped = _clamp_xy(x, y)
+    pyautogui.moveTo(safe_x, safe_y)
+    _settle("move", settle)
+    shot_x, shot_y = _to_screenshot(safe_x, safe_y)
+
+    msg = f"Mouse moved to ({shot_x}, {shot_y})."
+    if clamped:
+        msg += f" (Clamped from {x}, {y} to avoid screen edges)"
+    return msg
+
+
+def _click(
+    x: int | None = None,
+    y: int | None = None,
+    button: str = "left",
+    clicks: int = 1,
+    settle: float | None = None,
+) -> str:
+    if x is not None and y is not None:
+        safe_x, safe_y, clamped = _clamp_xy(x, y)
+        pyautogui.click(x=safe_x, y=safe_y, button=button, clicks=clicks)
+        _settle("click", settle)
+        shot_x, shot_y = _to_screenshot(safe_x, safe_y)
+        msg = f"Clicked {button} button {clicks} time(s) at ({shot_x}, {shot_y})."
+        if clamped:
+            msg += f" (Clamped from {x}, {y})"
+        return msg
+
+    pyautogui.click(button=button, clicks=clicks)
+    _settle("click", settle)
+    curr_x, curr_y = _to_screenshot(*pyautogui.position())
+    return f"Clicked {button} button {clicks} time(s) at current position ({curr_x}, {curr_y})."
+
+
+def _drag(x: int, y: int, button: str = "left", settle: float | None = None) -> str:
+    safe_x, safe_y, clamped = _clamp_xy(x, y)
+    pyautogui.dragTo(safe_x, safe_y, button=button)
+    _settle("drag", settle)
+    shot_x, shot_y = _to_screenshot(safe_x, safe_y)
+
+    msg = f"Dragged mouse to ({shot_x}, {shot_y}) with {button} button."
+    if clamped:
+        msg += f" (Clamped from {x}, {y})"
+    return msg
+
+
+def _scroll(clicks: int, settle: float | None = None) -> str:
+    pyautogui.scroll(clicks)
+    _settle("scroll", settle)
+    direction = "up" if clicks > 0 else "down"
+    return f"Scrolled {direction} by {abs(clicks)} units."
+
+
+def _set_clipboard(text: str) -> bool:
+    """Place text on the system clipboard. Returns False if no clipboard tool works."""
+    for cmd in CLIPBOARD_COMMANDS:
+        if shutil.which(cmd[0]) is None:
+            continue
+        try:
+            # The X11/Wayland tools fork a process that keeps serving the selection,
+            # so their output must not be captured or run() would wait for it
+            subprocess.run(
+                cmd,
+                input=text.encode("utf-8"),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+                timeout=5,
+            )
+            return True
+        except (subprocess.SubprocessError, OSError):
+            continue
+    return False
+
+
+def _preview(text: str, limit: int = 80) -> str:
+    """Shorten long text for status messages."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text)} characters)"
+
+
+def _type(
+    text: str,
+    interval: float = 0.01,
+    press_key: str | None = None,
+    settle: float | None = None,
+    method: str = "auto",
+) -> str:
+    if method not in ("auto", "paste", "type"):
+        raise ValueError(f"Unknown typing method '{method}'.")
+    if method == "auto":
+        pasteable = len(text) >= PASTE_MIN_LENGTH or not text.isascii()
+        method = "paste" if pasteable else "type"
+
+    if method == "paste" and _set_clipboard(text):
+        paste_modifier = "command" if platform.system() == "Darwin" else "ctrl"
+        pyautogui.hotkey(paste_modifier, "v")
+        msg = f"Pasted text: '{_preview(text)}'"
+    else:
+        # pyautogui.write silently skips characters it has no key for
+        if not text.isascii():
+            if method == "paste":
+                raise ValueError(
+                    "Non-ASCII text can only be pasted, and no clipboard tool "
+                    "worked (install xclip, xsel or wl-clipboard)."
+                )
+            raise ValueError(
+                "Non-ASCII text cannot be typed key by key; use method='paste'."
+            )
+        for start in range(0, len(text), TYPE_CHUNK_SIZE):
+            pyautogui.write(text[start : start + TYPE_CHUNK_SIZE], interval=interval)
+        msg = f"Typed text: '{_preview(text)}'"
+    if press_key:
+        pyautogui.press(press_key)
+        msg += f" and pressed '{press_key}'"
+    _settle("type", settle)
+    return msg
+
+
+def _press(key: str, presses: int = 1, settle: float | None = None) -> str:
+    pyautogui.press(key, presses=presses)
+    _settle("press", settle)
+    return f"Pressed '{key}' {presses} time(s)."
+
+
+def _hotkey(keys: str | list[str], settle: float | None = None) -> str:
+    key_list = keys if isinstance(keys, list) else keys.split(",")
+    key_list = [k.strip() for k in key_list]
+    pyautogui.hotkey(*key_list)
+    _settle("hotkey", settle)
+    return f"Pressed hotkey: {' + '.join(key_list)}"
+
+
 @tool
-def take_screenshot() -> list:
+def take_screenshot(diff: bool = False) -> list:
     """Take a screenshot of the primary screen.
 
     Returns the screenshot as a base64-encoded image suitable for multimodal models.
+    The image may be downscaled; coordinates in it can be passed directly to the
+    mouse tools. In diff mode only the regions that changed since the previous
+    screenshot are returned, each with its coordinates, which is much cheaper
+    after small interactions such as a click or a key press.
+
+    Args:
+        diff: If True, return only the changed regions (or a "no change" note)
+              instead of the full screen. Falls back to the full screen when there
+              is no previous screenshot or most of the screen changed.
 
     Returns:
         List containing image metadata and base64 data, or an error message.
     """
     try:
         with gui_lock:
-            screenshot = pyautogui.screenshot()
+            frame, previous = _grab_frame()
+        return _screenshot_content(frame, previous, diff)
+    except Exception as e:
+        return [{"type": "text", "text": f"Error taking screenshot: {str(e)}"}]
 
-        buffer = io.BytesIO()
-        screenshot.save(buffer, format="PNG")
-        image_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+@tool
+def take_screenshot_region(x: int, y: int, w: int, h: int, zoom: float = 2.0) -> list:
+    """Take a zoomed-in screenshot of a rectangular region of the screen.
+
+    Use this to inspect small details (text, icons, buttons) after a full
+    screenshot. The region is cropped from a recent full-resolution capture when
+    one is available, which is much faster than capturing the screen again.
+
+    Args:
+        x: Left edge of the region, in screenshot coordinates.
+        y: Top edge of the region, in screenshot coordinates.
+        w: Width of the region, in screenshot coordinates.
+        h: Height of the region, in screenshot coordinates.
+        zoom: Magnification factor relative to the full screenshot. Defaults to 2.0.
+
+    Returns:
+        List containing image metadata and base64 data, or an error message.
+    """
+    try:
+        if w <= 0 or h <= 0:
+            return [
+                {
+                    "type": "text",
+                    "text": "Error: Region width and height must be positive.",
+                }
+            ]
+        zoom = max(1.0, min(zoom, MAX_REGION_ZOOM))
+
+        with gui_lock:
+            raw = _raw_frame
+            if raw is None or time.monotonic() - _raw_frame_time > SCREENSHOT_CACHE_TTL:
+                raw = _capture()
+            shot_width, shot_height = _screenshot_size or fit_size(
+                raw.size, SCREENSHOT_MAX_DIM
+            )
+
+        scale_x = raw.width / shot_width
+        scale_y = raw.height / shot_height
+        box = (
+            max(0, round(x * scale_x)),
+            max(0, round(y * scale_y)),
+            min(raw.width, round((x + w) * scale_x)),
+            min(raw.height, round((y + h) * scale_y)),
+        )
+        if box[0] >= box[2] or box[1] >= box[3]:
+            return [{"type": "text", "text": "Error: Region is outside the screen."}]
+
+        size = fit_size(
+            (max(1, round(w * zoom)), max(1, round(h * zoom))), SCREENSHOT_MAX_DIM
+        )
+        region = raw.crop(box).resize(size, Image.Resampling.LANCZOS)
 
         return [
-            {"type": "text", "text": "Screenshot captured successfully."},
             {
-                "type": "image",
-                "source_type": "base64",
-                "data": image_data,
-                "mime_type": "image/png",
+                "type": "text",
+                "text": f"Region from ({x}, {y}) to ({x + w}, {y + h}) at {zoom:g}x zoom.",
             },
+            _image_block(region),
         ]
     except Exception as e:
-        return [{"type": "text", "text": f"Error taking screenshot: {str(e)}"}]
+        return [{"type": "text", "text": f"Error taking screenshot region: {str(e)}"}]
 
 
 @tool
 def get_screen_info() -> str:
     """Get information about the screen size and current mouse position.
 
+    Mouse coordinates are reported in screenshot space, the same space the
+    mouse tools accept.
+
     Returns:
-        String with screen resolution and mouse coordinates.
+        String with screen and screenshot resolutions and mouse coordinates.
     """
     try:
         with gui_lock:
             width, height = pyautogui.size()
-            x, y = pyautogui.position()
+            x, y = _to_screenshot(*pyautogui.position())
+            shot_width, shot_height = _screenshot_size or fit_size(
+                (width, height), SCREENSHOT_MAX_DIM
+            )
         return (
-            f"Screen resolution: {width}x{height}\nCurrent mouse position: ({x}, {y})"
+            f"Screen resolution: {width}x{height}\n"
+            f"Screenshot resolution: {shot_width}x{shot_height}\n"
+            f"Current mouse position: ({x}, {y})"
         )
     except Exception as e:
         return f"Error getting screen info: {str(e)}"
@@ -112,7 +586,7 @@ def get_mouse_position() -> str:
     """
     try:
         with gui_lock:
-            x, y = pyautogui.position()
+            x, y = _to_screenshot(*pyautogui.position())
         return f"Current mouse position: ({x}, {y})"
     except Exception as e:
         return f"Error getting mouse position: {str(e)}"
@@ -123,21 +597,15 @@ def move_mouse(x: int, y: int) -> str:
     """Move the mouse cursor to a specific coordinate.
 
     Args:
-        x: The x-coordinate to move to.
-        y: The y-coordinate to move to.
+        x: The x-coordinate to move to, in screenshot coordinates.
+        y: The y-coordinate to move to, in screenshot coordinates.
 
     Returns:
         Success message or error.
     """
     try:
         with gui_lock:
-            safe_x, safe_y, clamped = _clamp_xy(x, y)
-            pyautogui.moveTo(safe_x, safe_y)
-
-        msg = f"Mouse moved to ({safe_x}, {safe_y})."
-        if clamped:
-            msg += f" (Clamped from {x}, {y} to avoid screen edges)"
-        return msg
+            return _move(x, y)
     except Exception as e:
         return f"Error moving mouse: {str(e)}"
 
@@ -149,8 +617,8 @@ def mouse_click(
     """Click the mouse.
 
     Args:
-        x: Optional x-coordinate to click at. If None, clicks at current position.
-        y: Optional y-coordinate to click at. If None, clicks at current position.
+        x: Optional x-coordinate to click at, in screenshot coordinates. If None, clicks at current position.
+        y: Optional y-coordinate to click at, in screenshot coordinates. If None, clicks at current position.
         button: Mouse button to click ('left', 'middle', 'right'). Defaults to 'left'.
         clicks: Number of clicks (e.g., 2 for double-click). Defaults to 1.
 
@@ -159,20 +627,7 @@ def mouse_click(
     """
     try:
         with gui_lock:
-            clamped = False
-            if x is not None and y is not None:
-                safe_x, safe_y, clamped = _clamp_xy(x, y)
-                pyautogui.click(x=safe_x, y=safe_y, button=button, clicks=clicks)
-                msg = (
-                    f"Clicked {button} button {clicks} time(s) at ({safe_x}, {safe_y})."
-                )
-                if clamped:
-                    msg += f" (Clamped from {x}, {y})"
-                return msg
-            else:
-                pyautogui.click(button=button, clicks=clicks)
-                curr_x, curr_y = pyautogui.position()
-                return f"Clicked {button} button {clicks} time(s) at current position ({curr_x}, {curr_y})."
+            return _click(x, y, button=button, clicks=clicks)
     except Exception as e:
         return f"Error clicking mouse: {str(e)}"
 
@@ -182,8 +637,8 @@ def mouse_drag(x: int, y: int, button: str = "left") -> str:
     """Drag the mouse to a specific coordinate while holding a button.
 
     Args:
-        x: The x-coordinate to drag to.
-        y: The y-coordinate to drag to.
+        x: The x-coordinate to drag to, in screenshot coordinates.
+        y: The y-coordinate to drag to, in screenshot coordinates.
         button: Mouse button to hold down ('left', 'middle', 'right'). Defaults to 'left'.
 
     Returns:
@@ -191,13 +646,7 @@ def mouse_drag(x: int, y: int, button: str = "left") -> str:
     """
     try:
         with gui_lock:
-            safe_x, safe_y, clamped = _clamp_xy(x, y)
-            pyautogui.dragTo(safe_x, safe_y, button=button)
-
-        msg = f"Dragged mouse to ({safe_x}, {safe_y}) with {button} button."
-        if clamped:
-            msg += f" (Clamped from {x}, {y})"
-        return msg
+            return _drag(x, y, button=button)
     except Exception as e:
         return f"Error dragging mouse: {str(e)}"
 
@@ -214,33 +663,33 @@ def scroll(clicks: int) -> str:
     """
     try:
         with gui_lock:
-            pyautogui.scroll(clicks)
-        direction = "up" if clicks > 0 else "down"
-        return f"Scrolled {direction} by {abs(clicks)} units."
+            return _scroll(clicks)
     except Exception as e:
         return f"Error scrolling: {str(e)}"
 
 
 @tool
-def keyboard_type(text: str, interval: float = 0.1, press_key: str = None) -> str:
+def keyboard_type(
+    text: str, interval: float = 0.01, press_key: str = None, method: str = "auto"
+) -> str:
     """Type text using the keyboard, optionally pressing a key afterwards.
 
+    Long text is pasted through the clipboard instead of typed key by key, which
+    is much faster. Use method='type' for fields that do not accept pasting.
+
     Args:
         text: The string to type.
-        interval: Seconds to wait between keystrokes. Defaults to 0.1.
+        interval: Seconds to wait between keystrokes when typing. Defaults to 0.01.
         press_key: Optional key to press after typing (e.g., 'enter').
+        method: 'auto' (paste long or non-ASCII text, type the rest), 'paste'
+                or 'type'. Pasting falls back to typing if no clipboard is available.
 
     Returns:
         Success message or error.
     """
     try:
         with gui_lock:
-            pyautogui.write(text, interval=interval)
-            msg = f"Typed text: '{text}'"
-            if press_key:
-                pyautogui.press(press_key)
-                msg += f" and pressed '{press_key}'"
-            return msg
+            return _type(text, interval=interval, press_key=press_key, method=method)
     except Exception as e:
         return f"Error typing text: {str(e)}"
 
@@ -259,8 +708,7 @@ def keyboard_press(key: str, presses: int = 1) -> str:
     """
     try:
         with gui_lock:
-            pyautogui.press(key, presses=presses)
-        return f"Pressed '{key}' {presses} time(s)."
+            return _press(key, presses=presses)
     except Exception as e:
         return f"Error pressing key: {str(e)}"
 
@@ -277,16 +725,95 @@ def keyboard_hotkey(keys: str) -> str:
     """
     try:
         with gui_lock:
-            key_list = [k.strip() for k in keys.split(",")]
-            pyautogui.hotkey(*key_list)
-        return f"Pressed hotkey: {' + '.join(key_list)}"
+            return _hotkey(keys)
     except Exception as e:
         return f"Error pressing hotkey: {str(e)}"
 
 
+_BATCH_ACTIONS = {
+    "move": _move,
+    "click": _click,
+    "drag": _drag,
+    "scroll": _scroll,
+    "type": _type,
+    "press": _press,
+    "hotkey": _hotkey,
+}
+
+
+@tool
+def gui_batch(actions: list[dict], screenshot: bool = False) -> list:
+    """Run a sequence of GUI actions in one call, e.g. to fill in a form.
+
+    Actions run in order without other GUI tools interleaving. Execution stops
+    at the first failing action. Each action is a dict with an "action" key and
+    that action's arguments:
+        {"action": "move", "x": 100, "y": 200}
+        {"action": "click", "x": 100, "y": 200, "button": "left", "clicks": 1}
+        {"action": "drag", "x": 300, "y": 200, "button": "left"}
+        {"action": "scroll", "clicks": -5}
+        {"action": "type", "text": "hello", "press_key": "enter", "method": "auto"}
+        {"action": "press", "key": "tab", "presses": 1}
+        {"action": "hotkey", "keys": "ctrl,a"}
+        {"action": "wait", "seconds": 1.0}
+        {"action": "screenshot", "diff": false}
+    Any action except wait and screenshot also accepts "settle": the maximum
+    seconds to wait for the screen to stop changing afterwards (0 to skip).
+    Coordinates are in screenshot space.
+
+    Args:
+        actions: List of action dicts to execute in order.
+        screenshot: If True, append a screenshot taken after the last action.
+
+    Returns:
+        List with a numbered result line per action and any screenshots taken.
+    """
+    results = []
+    images = []
+    try:
+        with gui_lock:
+            for i, spec in enumerate(actions, start=1):
+                params = dict(spec)
+                name = params.pop("action", None)
+                try:
+                    if name == "wait":
+                        seconds = min(float(params.get("seconds", 1.0)), MAX_BATCH_WAIT)
+                        time.sleep(max(0.0, seconds))
+                        _invalidate_frame()
+                        results.append(f"{i}. wait: Waited {seconds:g} seconds.")
+                    elif name == "screenshot":
+                        frame, previous = _grab_frame()
+                        content = _screenshot_content(
+                            frame, previous, bool(params.get("diff", False))
+                        )
+                        results.append(f"{i}. screenshot: {content[0]['text']}")
+                        images.extend(content[1:])
+                    elif name in _BATCH_ACTIONS:
+                        results.append(f"{i}. {name}: {_BATCH_ACTIONS[name](**params)}")
+                    else:
+                        raise ValueError(f"unknown action '{name}'")
+                except Exception as e:
+                    results.append(f"{i}. {name}: Error: {str(e)}")
+                    skipped = len(actions) - i
+                    if skipped:
+                        results.append(
+                            f"Stopped; {skipped} remaining action(s) skipped."
+                        )
+                    break
+            else:
+                if screenshot:
+                    frame, previous = _grab_frame()
+                    images.extend(_screenshot_content(frame, previous, False)[1:])
+
+        return [{"type": "text", "text": "\n".join(results)}] + images
+    except Exception as e:
+        return [{"type": "text", "text": f"Error running GUI batch: {str(e)}"}]
+
+
 gui_tools = [
     focus_window,
     take_screenshot,
+    take_screenshot_region,
     get_screen_info,
     get_mouse_position,
     move_mouse,
@@ -296,4 +823,5 @@ gui_tools = [
     keyboard_type,
     keyboard_press,
     keyboard_hotkey,
+    gui_batch,
 ]
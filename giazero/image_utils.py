@@ -0,0 +1,95 @@
+import base64
+import io
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def fit_size(size: tuple[int, int], max_dim: int | None) -> tuple[int, int]:
+    """Scale (width, height) down so the longest side is at most max_dim.
+
+    Sizes that already fit, and a max_dim of None or 0, are returned unchanged.
+    """
+    width, height = size
+    if not max_dim or max(width, height) <= max_dim:
+        return width, height
+    ratio = max_dim / max(width, height)
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def downscale(image: Image.Image, max_dim: int | None) -> Image.Image:
+    """Resize an image so its longest side is at most max_dim pixels."""
+    target = fit_size(image.size, max_dim)
+    if target == image.size:
+        return image
+    return image.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+# EXIF orientations that rotate the image by 90 or 270 degrees
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def load_image(
+    path: Path, max_dim: int | None = None
+) -> tuple[Image.Image, tuple[int, int]]:
+    """Open an image file upright (EXIF orientation applied) and fully decoded.
+
+    For JPEGs, max_dim lets the decoder skip detail that a later downscale to
+    max_dim would discard, which makes decoding large photos much faster.
+
+    Returns:
+        The decoded image and the upright size of the original image, which is
+        larger than the decoded image when reduced-scale decoding was used.
+    """
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in _ROTATED_ORIENTATIONS:
+            width, height = height, width
+        if max_dim and image.format == "JPEG":
+            image.draft("RGB", fit_size(image.size, max_dim))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    return image, (width, height)
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def encode_image(
+    image: Image.Image, fmt: str = "png", quality: int = 85, grayscale: bool = False
+) -> dict:
+    """Encode a PIL image as a base64 image content block for multimodal models.
+
+    Args:
+        image: The image to encode.
+        fmt: Output format ("png", "jpeg" or "webp").
+        quality: Quality (1-100) for lossy formats; ignored for PNG.
+        grayscale: Convert to a single luminance channel before encoding.
+
+    Returns:
+        Content block with base64 data and MIME type.
+    """
+    fmt = "jpeg" if fmt.lower() == "jpg" else fmt.lower()
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unsupported image format '{fmt}'.")
+
+    if grayscale:
+        image = image.convert("L")
+    elif fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    options = {} if fmt == "png" else {"quality": quality}
+    image.save(buffer, format=fmt.upper(), **options)
+
+    return {
+        "type": "image",
+        "source_type": "base64",
+        "data": base64.b64encode(buffer.getvalue()).decode("utf-8"),
+        "mime_type": MIME_TYPES[fmt],
+    }
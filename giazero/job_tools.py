@@ -0,0 +1,241 @@
+import atexit
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from langchain.tools import tool
+from process_utils import kill_process_tree
+
+# Most bytes returned by a single read_job_output call
+MAX_TAIL_BYTES = 16 * 1024
+# Seconds kill_job waits after SIGTERM before sending SIGKILL
+KILL_GRACE_PERIOD = 5.0
+
+
+class Job:
+    def __init__(self, job_id: str, cmd: str, log_path: Path):
+        self.id = job_id
+        self.cmd = cmd
+        self.log_path = log_path
+        self.started = time.monotonic()
+        self.killed = False
+        with open(log_path, "wb") as log:
+            self.proc = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+    def status(self) -> str:
+        elapsed = time.monotonic() - self.started
+        returncode = self.proc.poll()
+        if returncode is None:
+            return f"running for {elapsed:.0f}s"
+        if self.killed:
+            return "killed"
+        return f"exited with return code {returncode}"
+
+    def kill(self):
+        self.killed = True
+        kill_process_tree(self.proc, signal.SIGTERM)
+        try:
+            self.proc.wait(timeout=KILL_GRACE_PERIOD)
+        except subprocess.TimeoutExpired:
+            kill_process_tree(self.proc)
+            self.proc.wait()
+
+
+class JobRegistry:
+    """The background jobs of one agent and the directory for their output files.
+
+    Job ids are numbered from job-1 in each registry.
+    """
+
+    def __init__(self, jobs_dir: Path):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        _registries.add(self)
+
+    def start(self, cmd: str) -> Job:
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            job_id = f"job-{len(self.jobs) + 1}"
+            job = self.jobs[job_id] = Job(job_id, cmd, self.jobs_dir / f"{job_id}.log")
+        return job
+
+    def kill_all(self):
+        """Kill every running job and forget all jobs."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+            self.jobs.clear()
+        for job in jobs:
+            if job.proc.poll() is None:
+                kill_process_tree(job.proc)
+
+
+_registries = weakref.WeakSet()
+# Registry of the running agent; see use_jobs
+_registry = ContextVar(
+    "job_registry",
+    default=JobRegistry(Path(tempfile.gettempdir()) / "giazero-jobs"),
+)
+
+
+@contextmanager
+def use_jobs(registry: JobRegistry):
+    """Keep the jobs started, listed or killed inside this block in registry.
+
+    The registry is held in a context variable, so agents running
+    concurrently in one process each see only their own jobs.
+    """
+    token = _registry.set(registry)
+    try:
+        yield
+    finally:
+        _registry.reset(token)
+
+
+def _tail(path: Path, lines: int) -> tuple[str, int]:
+    """Return the last lines of a file (at most MAX_TAIL_BYTES) and the file size."""
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        start = max(0, size - MAX_TAIL_BYTES)
+        f.seek(start)
+        data = f.read()
+    if start > 0:
+        # Drop the partial first line
+        data = data[data.find(b"\n") + 1 :]
+    text = data.decode("utf-8", errors="replace")
+    return "\n".join(text.splitlines()[-lines:]), size
+
+
+def _get_job(job_id: str) -> Job:
+    registry = _registry.get()
+    with registry.lock:
+        job = registry.jobs.get(job_id)
+    if job is None:
+        raise KeyError(f"No job with id '{job_id}'.")
+    return job
+
+
+def kill_all_jobs(everywhere: bool = False):
+    """Kill and forget the current agent's jobs, or those of every agent if everywhere.
+
+    Called at exit, and between tasks of a batch worker.
+    """
+    registries = list(_registries) if everywhere else [_registry.get()]
+    for registry in registries:
+        registry.kill_all()
+
+
+atexit.register(kill_all_jobs, everywhere=True)
+
+
+@tool
+def start_job(cmd: str) -> str:
+    """Start a shell command in the background and return immediately.
+
+    Use this for long-running builds, test suites, downloads or servers, then
+    keep working and check on the job with get_job_status and read_job_output.
+    Stdout and stderr are written together to a log file.
+
+    Args:
+        cmd: Shell command string to run.
+
+    Returns:
+        The job id and log file path, or an error message.
+    """
+    try:
+        job = _registry.get().start(cmd)
+        return f"Started {job.id} (output: {job.log_path})."
+    except Exception as e:
+        return f"Error starting job: {str(e)}"
+
+
+@tool
+def get_job_status(job_id: str = None) -> str:
+    """Get the status of a background job, or of all jobs.
+
+    Args:
+        job_id: Id returned by start_job. If None, lists all jobs.
+
+    Returns:
+        One line per job with its id, status and command, or an error message.
+    """
+    try:
+        if job_id is None:
+            registry = _registry.get()
+            with registry.lock:
+                jobs = list(registry.jobs.values())
+            if not jobs:
+                return "No jobs have been started."
+        else:
+            jobs = [_get_job(job_id)]
+        return "\n".join(f"{job.id}: {job.status()} - {job.cmd}" for job in jobs)
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error getting job status: {str(e)}"
+
+
+@tool
+def read_job_output(job_id: str, lines: int = 50) -> str:
+    """Read the last lines of a background job's combined stdout/stderr.
+
+    Args:
+        job_id: Id returned by start_job.
+        lines: Number of lines from the end of the output to return. Defaults to 50.
+
+    Returns:
+        The job status followed by its latest output, or an error message.
+    """
+    try:
+        job = _get_job(job_id)
+        status = job.status()
+        output, size = _tail(job.log_path, lines)
+        header = f"{job.id}: {status}, {size} bytes of output in {job.log_path}"
+        return f"{header}\n{output}" if output else f"{header}\n(no output yet)"
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error reading job output: {str(e)}"
+
+
+@tool
+def kill_job(job_id: str) -> str:
+    """Stop a background job and any processes it started.
+
+    Args:
+        job_id: Id returned by start_job.
+
+    Returns:
+        Success message or error.
+    """
+    try:
+        job = _get_job(job_id)
+        if job.proc.poll() is not None:
+            return f"{job.id} already {job.status()}."
+        job.kill()
+        return f"Killed {job.id}."
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error killing job: {str(e)}"
+
+
+job_tools = [
+    start_job,
+    get_job_status,
+    read_job_output,
+    kill_job,
+]
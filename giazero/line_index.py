@@ -0,0 +1,104 @@
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, islice
+from pathlib import Path
+
+# Offset of every LINE_INDEX_STRIDE-th line is stored; reaching any other line
+# scans at most this many lines from the nearest stored one
+LINE_INDEX_STRIDE = 256
+# Number of files whose line index is kept in memory
+LINE_INDEX_CACHE_SIZE = 32
+# Bytes scanned per step while building an index
+_SCAN_CHUNK_SIZE = 1 << 20
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class LineIndex:
+    """Sparse index of line start offsets in a file, used to seek to any line quickly."""
+
+    def __init__(self, path: Path, stat: os.stat_result):
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.checkpoints = array("Q", [0])
+        self.line_count = 0
+        if self.size:
+            self._build()
+
+    def _build(self):
+        newlines = 0
+        with (
+            open(self.path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            for base in range(0, self.size, _SCAN_CHUNK_SIZE):
+                parts = mm[base : base + _SCAN_CHUNK_SIZE].split(b"\n")
+                # Running sums of (part length + 1) are the offsets, relative to
+                # the chunk, of the lines that start after each newline
+                starts = accumulate(map((1).__add__, map(len, parts[:-1])))
+                # The i-th newline in this chunk starts line newlines + i + 1
+                phase = -(newlines + 1) % LINE_INDEX_STRIDE
+                self.checkpoints.extend(
+                    base + start
+                    for start in islice(starts, phase, None, LINE_INDEX_STRIDE)
+                )
+                newlines += len(parts) - 1
+            ends_with_newline = mm[self.size - 1 : self.size] == b"\n"
+        self.line_count = newlines if ends_with_newline else newlines + 1
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def read_lines(self, start: int, count: int) -> list[bytes]:
+        """Read up to count lines starting at 1-based line number start."""
+        if start > self.line_count or count <= 0:
+            return []
+        lines = []
+        with (
+            open(self.path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        ):
+            checkpoint, skip = divmod(start - 1, LINE_INDEX_STRIDE)
+            pos = self.checkpoints[checkpoint]
+            for _ in range(skip):
+                pos = mm.find(b"\n", pos) + 1
+            while len(lines) < count and pos < self.size:
+                end = mm.find(b"\n", pos)
+                if end == -1:
+                    end = self.size
+                lines.append(mm[pos:end])
+                pos = end + 1
+        return lines
+
+
+def get_line_index(path: Path) -> LineIndex:
+    """Return the line index of a file, rebuilding it if the file changed."""
+    stat = path.stat()
+    key = str(path)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and index.matches(stat):
+            _cache.move_to_end(key)
+            return index
+
+    index = LineIndex(path, stat)
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > LINE_INDEX_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def read_bytes(path: Path, offset: int, length: int) -> bytes:
+    """Read a byte range of a file through a memory map."""
+    size = path.stat().st_size
+    if offset >= size or length <= 0:
+        return b""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[offset : offset + length]
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+# Entries older than this many seconds are treated as missing
+LLM_CACHE_TTL = 7 * 24 * 3600
+# Least recently used entries are evicted once the cached responses exceed this
+LLM_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+# Message fields left out of cache keys: they describe earlier responses (token
+# counts, provider ids) and are not sent back to the model, but differ between
+# a live response and the same response served from the cache
+_UNSENT_MESSAGE_FIELDS = ("response_metadata", "usage_metadata")
+
+
+class SQLiteLLMCache(BaseCache):
+    """On-disk cache of chat model responses, keyed by the request content.
+
+    LangChain passes the serialized messages (without message ids) as the
+    prompt, and the model name, parameters and bound tools as llm_string, so
+    identical requests hit the cache and anything else misses. Replaying a
+    run therefore hits on every step, as each cached response leads to the
+    same next request. Entries expire after ttl seconds, and the least recently
+    used ones are evicted when the total size exceeds max_bytes. Safe to share
+    between threads and processes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float | None = LLM_CACHE_TTL,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        try:
+            messages = json.loads(prompt)
+            for message in messages:
+                for field in _UNSENT_MESSAGE_FIELDS:
+                    message.get("kwargs", {}).pop(field, None)
+            prompt = json.dumps(messages, sort_keys=True)
+        except (ValueError, TypeError, AttributeError):
+            pass
+        digest = hashlib.sha256(prompt.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(llm_string.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> list[ChatGeneration] | None:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return [
+            ChatGeneration(
+                message=messages_from_dict([item["message"]])[0],
+                generation_info=item["generation_info"],
+            )
+            for item in json.loads(row[0])
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        if not all(isinstance(g, ChatGeneration) for g in return_val):
+            return
+        value = json.dumps(
+            [
+                {
+                    "message": message_to_dict(g.message),
+                    "generation_info": g.generation_info,
+                }
+                for g in return_val
+            ],
+            default=str,
+        )
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            )
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> str:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return f"{count} cached responses, {size} bytes"
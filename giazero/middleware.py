@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from file_index import stop_file_index, use_indexes
+from job_tools import JobRegistry, use_jobs
+from langchain.agents.middleware import AgentMiddleware
+from langchain.messages import AIMessage, ToolMessage
+from session_tools import SessionRegistry, use_sessions
+
+# Longest a GUI tool call waits for the GUI calls emitted before it, in seconds
+GUI_ORDER_TIMEOUT = 600
+# How often waiting GUI calls check their turn under the async runtime, in seconds
+GUI_ORDER_POLL_INTERVAL = 0.01
+
+
+class OrderedGuiToolsMiddleware(AgentMiddleware):
+    """Run GUI tool calls one at a time, in the order the model emitted them.
+
+    The agent dispatches all tool calls from one model turn concurrently. Other
+    tools run freely, but each GUI call waits until the GUI calls before it in
+    the same turn have finished, so e.g. a click and the typing that follows
+    it are never reordered.
+    """
+
+    def __init__(self, tool_names: list[str] | None = None):
+        super().__init__()
+        if tool_names is None:
+            # Imported here as pyautogui needs a display, which replays lack
+            from gui_tools import gui_tools
+
+            tool_names = [t.name for t in gui_tools]
+        self.tool_names = set(tool_names)
+        self._finished = set()
+        self._condition = threading.Condition()
+
+    def _pending_earlier_calls(self, request) -> list[str]:
+        """Ids of GUI calls preceding this one in its turn that have not completed."""
+        call_id = request.tool_call["id"]
+        completed = set()
+        for message in reversed(request.state.get("messages", [])):
+            if isinstance(message, ToolMessage):
+                completed.add(message.tool_call_id)
+            elif isinstance(message, AIMessage) and message.tool_calls:
+                ids = [
+                    call["id"]
+                    for call in message.tool_calls
+                    if call["name"] in self.tool_names
+                ]
+                if call_id not in ids:
+                    return []
+                return [i for i in ids[: ids.index(call_id)] if i not in completed]
+        return []
+
+    def wrap_tool_call(self, request, handler):
+        if request.tool_call["name"] not in self.tool_names:
+            return handler(request)
+
+        earlier = self._pending_earlier_calls(request)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._finished.issuperset(earlier), timeout=GUI_ORDER_TIMEOUT
+            )
+        try:
+            return handler(request)
+        finally:
+            with self._condition:
+                self._finished.add(request.tool_call["id"])
+                self._condition.notify_all()
+
+    async def awrap_tool_call(self, request, handler):
+        if request.tool_call["name"] not in self.tool_names:
+            return await handler(request)
+
+        earlier = self._pending_earlier_calls(request)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + GUI_ORDER_TIMEOUT
+        while not self._finished.issuperset(earlier) and loop.time() < deadline:
+            await asyncio.sleep(GUI_ORDER_POLL_INTERVAL)
+        try:
+            return await handler(request)
+        finally:
+            with self._condition:
+                self._finished.add(request.tool_call["id"])
+                self._condition.notify_all()
+
+
+class TaskStateMiddleware(AgentMiddleware):
+    """Give this agent's tool calls their own jobs, shell sessions and file indexes.
+
+    They are set in context variables for the duration of each tool call, so
+    several agents can run concurrently in one process without sharing them.
+    """
+
+    def __init__(self, jobs_dir: Path, indexes: list):
+        super().__init__()
+        self.jobs = JobRegistry(jobs_dir)
+        self.sessions = SessionRegistry()
+        self.indexes = indexes
+
+    def close(self):
+        """Kill this agent's jobs, close its sessions and stop its file indexes."""
+        self.jobs.kill_all()
+        self.sessions.close_all()
+        stop_file_index(self.indexes)
+
+    @contextmanager
+    def _scope(self):
+        with (
+            use_jobs(self.jobs),
+            use_sessions(self.sessions),
+            use_indexes(self.indexes),
+        ):
+            yield
+
+    def wrap_tool_call(self, request, handler):
+        with self._scope():
+            return handler(request)
+
+    async def awrap_tool_call(self, request, handler):
+        with self._scope():
+            return await handler(request)
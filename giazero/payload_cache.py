@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Total size of cached payloads, in bytes of encoded text
+PAYLOAD_CACHE_MAX_BYTES = 128 * 1024 * 1024
+# Payloads larger than this fraction of the budget are not cached
+MAX_ENTRY_FRACTION = 0.25
+
+
+def file_key(path: Path, *params) -> tuple:
+    """Cache key for a payload derived from a file: path, mtime, size and options."""
+    stat = os.stat(path)
+    return (str(path), stat.st_mtime_ns, stat.st_size, *params)
+
+
+def content_key(data: bytes, *params) -> tuple:
+    """Cache key for a payload derived from in-memory content: its hash and options."""
+    return (hashlib.blake2b(data, digest_size=20).hexdigest(), *params)
+
+
+def payload_size(value) -> int:
+    """Approximate size of a payload: a string or a list of content blocks."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(v) for v in value.values() if isinstance(v, str))
+    return sum(payload_size(item) for item in value)
+
+
+def _copy(value):
+    """Copy containers so callers cannot modify cached content blocks."""
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+class PayloadCache:
+    """Thread-safe LRU cache of encoded tool payloads bounded by total size."""
+
+    def __init__(self, max_bytes: int = PAYLOAD_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy(entry[0])
+
+    def put(self, key: tuple, value):
+        size = payload_size(value)
+        if size > self.max_bytes * MAX_ENTRY_FRACTION:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (_copy(value), size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> str:
+        with self._lock:
+            return (
+                f"{len(self._entries)} entries, {self.size} bytes, "
+                f"{self.hits} hits, {self.misses} misses"
+            )
+
+
+# Shared by the file and screenshot tools
+payload_cache = PayloadCache()
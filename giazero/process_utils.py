@@ -0,0 +1,238 @@
+import asyncio
+import codecs
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+# Default wall-clock limit for commands, in seconds
+DEFAULT_TIMEOUT = 600
+# Maximum bytes kept per output stream; the middle of longer output is dropped
+MAX_OUTPUT_BYTES = 64 * 1024
+# Echo command output to the console while it runs
+STREAM_TO_CONSOLE = True
+# Seconds to wait for output readers after the process exits (background
+# children may keep the pipes open)
+READER_JOIN_TIMEOUT = 2.0
+# Longest interval between process exit checks in astream_process, in seconds
+MAX_POLL_INTERVAL = 0.05
+
+
+class CommandResult(NamedTuple):
+    stdout: str
+    stderr: str
+    returncode: int
+    timed_out: bool
+    duration: float
+
+
+class OutputBuffer:
+    """Collect a byte stream, keeping only its head and tail beyond a size cap."""
+
+    def __init__(self, max_bytes: int = MAX_OUTPUT_BYTES):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_limit:
+                del self.tail[: len(self.tail) - self.tail_limit]
+
+    def getvalue(self) -> str:
+        text = self.head.decode("utf-8", errors="replace")
+        dropped = self.total - len(self.head) - len(self.tail)
+        if dropped > 0:
+            text += f"\n... [{dropped} bytes of output truncated] ...\n"
+        return text + self.tail.decode("utf-8", errors="replace")
+
+
+def _pump(stream, buffer: OutputBuffer, console):
+    """Copy a pipe into a buffer, optionally echoing it to a console stream."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in iter(lambda: stream.read1(4096), b""):
+        buffer.write(chunk)
+        if console is not None:
+            console.write(decoder.decode(chunk))
+            console.flush()
+    stream.close()
+
+
+async def _apump(stream, buffer: OutputBuffer, console):
+    """Async version of _pump, reading the pipe on the running event loop."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), stream
+    )
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while chunk := await reader.read(4096):
+            buffer.write(chunk)
+            if console is not None:
+                console.write(decoder.decode(chunk))
+                console.flush()
+    finally:
+        transport.close()
+
+
+def kill_process_tree(proc: subprocess.Popen, sig: int | None = None):
+    """Signal a process started with start_new_session=True and all its children.
+
+    Sends SIGKILL unless another signal is given; on Windows the process is killed.
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL if sig is None else sig)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def stream_process(
+    proc: subprocess.Popen,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    max_bytes: int = MAX_OUTPUT_BYTES,
+) -> CommandResult:
+    """Collect the output of a running process, enforcing a wall-clock timeout.
+
+    The process must have been started with stdout and stderr pipes in binary
+    mode, and with start_new_session=True so the whole process group can be
+    killed on timeout.
+    """
+    start = time.monotonic()
+    buffers = (OutputBuffer(max_bytes), OutputBuffer(max_bytes))
+    consoles = (sys.stdout, sys.stderr) if STREAM_TO_CONSOLE else (None, None)
+    readers = [
+        threading.Thread(target=_pump, args=args, daemon=True)
+        for args in zip((proc.stdout, proc.stderr), buffers, consoles)
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        kill_process_tree(proc)
+        proc.wait()
+
+    for reader in readers:
+        reader.join(READER_JOIN_TIMEOUT)
+
+    return CommandResult(
+        stdout=buffers[0].getvalue(),
+        stderr=buffers[1].getvalue(),
+        returncode=proc.returncode,
+        timed_out=timed_out,
+        duration=time.monotonic() - start,
+    )
+
+
+async def astream_process(
+    proc: subprocess.Popen,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    max_bytes: int = MAX_OUTPUT_BYTES,
+) -> CommandResult:
+    """Async version of stream_process that uses no threads.
+
+    Output is read on the event loop and the process is polled for exit, so
+    many processes can be awaited concurrently.
+    """
+    start = time.monotonic()
+    buffers = (OutputBuffer(max_bytes), OutputBuffer(max_bytes))
+    consoles = (sys.stdout, sys.stderr) if STREAM_TO_CONSOLE else (None, None)
+    readers = [
+        asyncio.create_task(_apump(*args))
+        for args in zip((proc.stdout, proc.stderr), buffers, consoles)
+    ]
+
+    timed_out = False
+    interval = 0.001
+    while proc.poll() is None:
+        if timeout is not None and time.monotonic() - start > timeout and not timed_out:
+            timed_out = True
+            kill_process_tree(proc)
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+    _, pending = await asyncio.wait(readers, timeout=READER_JOIN_TIMEOUT)
+    for reader in pending:
+        reader.cancel()
+
+    return CommandResult(
+        stdout=buffers[0].getvalue(),
+        stderr=buffers[1].getvalue(),
+        returncode=proc.returncode,
+        timed_out=timed_out,
+        duration=time.monotonic() - start,
+    )
+
+
+def run_streaming(
+    args: str | list[str],
+    shell: bool = False,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    max_bytes: int = MAX_OUTPUT_BYTES,
+) -> CommandResult:
+    """Run a command, streaming its output with a timeout and an output size cap."""
+    proc = subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    return stream_process(proc, timeout=timeout, max_bytes=max_bytes)
+
+
+async def arun_streaming(
+    args: str | list[str],
+    shell: bool = False,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    max_bytes: int = MAX_OUTPUT_BYTES,
+) -> CommandResult:
+    """Async version of run_streaming."""
+    proc = subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    return await astream_process(proc, timeout=timeout, max_bytes=max_bytes)
+
+
+def format_result(result: CommandResult, timeout: float | None = None) -> str:
+    """Format a command result as STDOUT/STDERR sections and the return code."""
+    output = ""
+    if result.stdout:
+        output += f"STDOUT:\n{result.stdout}"
+    if result.stderr:
+        if output:
+            output += "\n"
+        output += f"STDERR:\n{result.stderr}"
+    if result.timed_out:
+        if output:
+            output += "\n"
+        output += f"Timed out after {timeout} seconds; the process was killed."
+    elif result.returncode != 0:
+        if output:
+            output += "\n"
+        output += f"Return code: {result.returncode}"
+    return output
@@ -0,0 +1,192 @@
+import atexit
+import importlib
+import json
+import os
+import queue
+import runpy
+import select
+import subprocess
+import sys
+import threading
+import traceback
+from pathlib import Path
+
+from process_utils import (
+    DEFAULT_TIMEOUT,
+    CommandResult,
+    astream_process,
+    kill_process_tree,
+    stream_process,
+)
+
+# Number of warm workers kept ready; 0 disables the pool
+POOL_SIZE = 2
+# Modules imported by each worker before it is handed a script. Missing modules
+# are skipped.
+PRELOAD_MODULES = ["numpy", "pandas"]
+
+_READY_MARKER = b"__GIA_WORKER_READY__"
+
+
+class PythonWorkerPool:
+    """Keep Python processes with preloaded modules ready to run scripts.
+
+    Each worker runs exactly one script and then exits, so scripts never share
+    state; a replacement is started in the background as soon as a worker is
+    taken from the pool.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, preload: list[str] = PRELOAD_MODULES):
+        self.size = size
+        self.preload = list(preload)
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            ["python", str(Path(__file__).resolve()), *self.preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+
+    def _refill(self):
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def _acquire(self) -> subprocess.Popen | None:
+        """Take a worker that finished preloading, or None if none is usable."""
+        try:
+            proc = self._idle.get_nowait()
+        except queue.Empty:
+            return None
+        ready, _, _ = select.select([proc.stdout], [], [], 0)
+        if not ready:
+            # Still importing its preloads; keep it and let this script run cold
+            self._idle.put(proc)
+            return None
+        threading.Thread(target=self._refill, daemon=True).start()
+
+        if proc.stdout.readline().strip() != _READY_MARKER:
+            kill_process_tree(proc)
+            proc.wait()
+            return None
+        return proc
+
+    def run(
+        self, script: Path, timeout: float | None = DEFAULT_TIMEOUT
+    ) -> CommandResult | None:
+        """Run a script in a warm worker. Returns None if no worker is available."""
+        proc = self._acquire()
+        if proc is None:
+            return None
+        self._send_script(proc, script)
+        return stream_process(proc, timeout=timeout)
+
+    async def arun(
+        self, script: Path, timeout: float | None = DEFAULT_TIMEOUT
+    ) -> CommandResult | None:
+        """Async version of run."""
+        proc = self._acquire()
+        if proc is None:
+            return None
+        self._send_script(proc, script)
+        return await astream_process(proc, timeout=timeout)
+
+    @staticmethod
+    def _send_script(proc: subprocess.Popen, script: Path):
+        proc.stdin.write(json.dumps({"path": str(script)}).encode() + b"\n")
+        proc.stdin.close()
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            kill_process_tree(proc)
+            proc.wait()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PythonWorkerPool | None:
+    """Return the shared worker pool, starting it on first use."""
+    global _pool
+    if POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = PythonWorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _worker_main(preload: list[str]):
+    """Entry point of a worker process: preload modules, then run one script."""
+    # Discard anything printed while importing (e.g. warnings), which would
+    # otherwise show up in the output of the script run later
+    saved = os.dup(1), os.dup(2)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fd, original in zip((1, 2), saved):
+        os.dup2(original, fd)
+        os.close(original)
+    sys.stdout.buffer.write(_READY_MARKER + b"\n")
+    sys.stdout.flush()
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    path = json.loads(line)["path"]
+
+    # Match a cold `python <path>` run: no stdin, script directory first on
+    # sys.path and the script executed as __main__
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    sys.stdin = open(0, closefd=False)
+    sys.argv = [path]
+    sys.path[0] = os.path.dirname(path)
+    # Forget the worker's own modules (e.g. process_utils), so a script
+    # importing a module of the same name gets its own, as it would cold
+    worker_dir = os.path.dirname(os.path.abspath(__file__))
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if (
+            name != "__main__"
+            and module_file
+            and os.path.dirname(os.path.abspath(module_file)) == worker_dir
+        ):
+            del sys.modules[name]
+    importlib.invalidate_caches()
+
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit:
+        raise
+    except BaseException:
+        # Hide the worker and runpy frames, like the interpreter would
+        etype, value, tb = sys.exc_info()
+        while tb is not None and tb.tb_frame.f_code.co_filename != path:
+            tb = tb.tb_next
+        traceback.print_exception(etype, value, tb)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    _worker_main(sys.argv[1:])
@@ -0,0 +1,180 @@
+import json
+import threading
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+def _args_key(name: str, args: dict) -> str:
+    return name + json.dumps(args, sort_keys=True, default=str)
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Write a run's model responses and tool results to a JSON lines trace.
+
+    The first line holds what a replay needs to rebuild the agent (system
+    prompt, tool schemas, GUI tool names, model profile). It is followed by
+    the user prompt and one line per model response and per tool result, in
+    completion order. Model requests are recorded as their message count only,
+    which is enough to detect a replay diverging from the recording.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        path: Path,
+        system_prompt: str,
+        tools: list,
+        gui_tool_names: list[str],
+        profile: dict | None,
+    ):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Line buffered, so the trace of a crashed run is complete up to the crash
+        self._file = open(path, "w", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._tool_calls = {}
+        self._write(
+            {
+                "type": "header",
+                "system_prompt": system_prompt,
+                "tools": [convert_to_openai_tool(t)["function"] for t in tools],
+                "gui_tools": gui_tool_names,
+                "profile": dict(profile or {}),
+            }
+        )
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs
+    ):
+        if (
+            parent_run_id is None
+            and isinstance(inputs, dict)
+            and inputs.get("messages")
+        ):
+            self._write(
+                {"type": "input", "user_prompt": inputs["messages"][-1].content}
+            )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._requests[run_id] = len(messages[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        generation = response.generations[0][0]
+        self._write(
+            {
+                "type": "model",
+                "messages": self._requests.pop(run_id, None),
+                "response": message_to_dict(generation.message),
+            }
+        )
+
+    def on_tool_start(self, serialized, input_str, *, run_id, inputs=None, **kwargs):
+        self._tool_calls[run_id] = (serialized["name"], inputs or {})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, args = self._tool_calls.pop(run_id)
+        content = getattr(output, "content", output)
+        self._write({"type": "tool", "name": name, "args": args, "content": content})
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._tool_calls.pop(run_id, None)
+
+
+class Trace:
+    """A recorded run, loaded from a trace file written by TraceRecorder."""
+
+    def __init__(self, path: Path):
+        self.user_prompt = None
+        self.responses = []
+        self.tool_results = {}
+        with open(path, encoding="utf-8") as f:
+            self.header = json.loads(f.readline())
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "input" and self.user_prompt is None:
+                    self.user_prompt = record["user_prompt"]
+                elif record["type"] == "model":
+                    self.responses.append(record)
+                elif record["type"] == "tool":
+                    key = _args_key(record["name"], record["args"])
+                    self.tool_results.setdefault(key, []).append(record["content"])
+        if self.user_prompt is None:
+            raise ValueError(f"Trace '{path}' has no recorded input.")
+
+    @property
+    def tool_calls(self) -> int:
+        return sum(len(results) for results in self.tool_results.values())
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering with the responses of a recorded run, in order.
+
+    Raises RuntimeError if a request has a different number of messages than
+    the recorded one, i.e. the replay has diverged from the recording.
+    """
+
+    responses: list[dict]
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._lock:
+            if not self.responses:
+                raise RuntimeError("Replay requested more model calls than recorded.")
+            record = self.responses.pop(0)
+        if record["messages"] is not None and record["messages"] != len(messages):
+            raise RuntimeError(
+                f"Replay diverged: model request has {len(messages)} messages, "
+                f"recorded request had {record['messages']}."
+            )
+        message = messages_from_dict([record["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def replay_tools(trace: Trace) -> list:
+    """Tools with the recorded names and schemas, returning the recorded results.
+
+    Each call returns the next recorded result for the same tool and arguments.
+    """
+    results = {key: list(values) for key, values in trace.tool_results.items()}
+    lock = threading.Lock()
+
+    def make_tool(spec: dict):
+        def func(**kwargs):
+            with lock:
+                pending = results.get(_args_key(spec["name"], kwargs))
+                if not pending:
+                    return f"Error: no recorded result for this {spec['name']} call."
+                return pending.pop(0)
+
+        async def coroutine(**kwargs):
+            return func(**kwargs)
+
+        return StructuredTool(
+            name=spec["name"],
+            description=spec["description"],
+            args_schema=spec["parameters"],
+            func=func,
+            coroutine=coroutine,
+        )
+
+    return [make_tool(spec) for spec in trace.header["tools"]]
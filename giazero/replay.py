@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from agent import arun_agent, build_middleware, run_agent
+from langchain.agents import create_agent
+from recording import ReplayChatModel, Trace, replay_tools
+
+
+def build_replay_agent(trace: Trace):
+    """Create an agent with the recorded run's fake model and tools.
+
+    It has the same middleware as build_agent, and needs no network, API key
+    or display.
+    """
+    header = trace.header
+    model = ReplayChatModel(
+        responses=list(trace.responses), profile=header["profile"] or None
+    )
+    return create_agent(
+        model=model,
+        tools=replay_tools(trace),
+        system_prompt=header["system_prompt"],
+        middleware=build_middleware(model, header["gui_tools"]),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded run offline and time the agent loop."
+    )
+    parser.add_argument(
+        "trace",
+        type=Path,
+        help="Trace file written by agent.py --record.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Number of times the run is replayed (default: 1).",
+    )
+    parser.add_argument(
+        "--max-parallel-tools",
+        type=int,
+        default=8,
+        help="Maximum number of tool calls from one model turn run concurrently "
+        "(default: 8).",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Replay on an asyncio event loop (agent.astream).",
+    )
+    args = parser.parse_args()
+
+    trace = Trace(args.trace)
+    durations = []
+    for i in range(args.repeat):
+        agent = build_replay_agent(trace)
+        start = time.perf_counter()
+        if args.use_async:
+            asyncio.run(arun_agent(agent, trace.user_prompt, args.max_parallel_tools))
+        else:
+            run_agent(agent, trace.user_prompt, args.max_parallel_tools)
+        durations.append(time.perf_counter() - start)
+        print(
+            f"Replay {i + 1}: {durations[-1]:.3f}s ({len(trace.responses)} model "
+            f"calls, {trace.tool_calls} tool calls)",
+            file=sys.stderr,
+        )
+    if args.repeat > 1:
+        print(
+            f"Min {min(durations):.3f}s, mean {sum(durations) / len(durations):.3f}s",
+            file=sys.stderr,
+        )
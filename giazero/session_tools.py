@@ -0,0 +1,290 @@
+import atexit
+import codecs
+import os
+import re
+import select
+import signal
+import sys
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import process_utils
+from langchain.tools import tool
+from process_utils import DEFAULT_TIMEOUT, OutputBuffer
+
+try:
+    import pty
+except ImportError:  # Windows
+    pty = None
+
+# Maximum number of shell sessions open at the same time
+MAX_SESSIONS = 8
+# Seconds to wait for a session to start or to recover after an interrupt
+SESSION_SETUP_TIMEOUT = 10.0
+# Extra environment for session shells; keeps pagers and colors out of output
+SESSION_ENV = {"TERM": "dumb", "PAGER": "cat", "GIT_PAGER": "cat"}
+
+_SENTINEL_RE = re.compile(rb"\r?\n?__GIA_DONE_([0-9a-f]{32})_(\d+)__\r?\n")
+
+
+class SessionClosedError(Exception):
+    pass
+
+
+class ShellSession:
+    """An interactive bash process on a pseudo-terminal that keeps state across commands.
+
+    Each command is followed by a printf of a unique sentinel carrying the exit
+    status; output is read from the terminal until that sentinel appears.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.pid, self.fd = pty.fork()
+        if self.pid == 0:
+            env = {**os.environ, **SESSION_ENV}
+            args = ["bash", "--noprofile", "--norc", "--noediting", "-i"]
+            os.execvpe("bash", args, env)
+
+        # Terminal echo of this setup line is discarded with everything else
+        # printed before the first sentinel. Job control is turned off so
+        # background jobs stay in bash's process group, which close() kills
+        token = self._send(
+            "stty -echo; PS1=''; PS2=''; PROMPT_COMMAND=''; set +o history; set +m"
+        )
+        if self._wait_for_sentinel(token, SESSION_SETUP_TIMEOUT) is None:
+            self.close()
+            raise SessionClosedError(f"Shell session '{name}' failed to start.")
+
+    def _send(self, cmd: str) -> str:
+        """Write a command followed by a sentinel printf and return the sentinel token."""
+        token = uuid.uuid4().hex
+        sentinel = f"printf '\\n__GIA_DONE_%s_%s__\\n' {token} \"$?\""
+        os.write(self.fd, f"{cmd}\n{sentinel}\n".encode())
+        return token
+
+    def _wait_for_sentinel(
+        self, token: str, timeout: float | None, buffer: OutputBuffer | None = None
+    ) -> int | None:
+        """Read output until the sentinel with the given token arrives.
+
+        Sentinels of earlier, interrupted commands are dropped from the output.
+
+        Returns:
+            The exit status carried by the sentinel, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        console = sys.stdout if process_utils.STREAM_TO_CONSOLE else None
+        pending = b""
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                if buffer is not None:
+                    buffer.write(pending.replace(b"\r\n", b"\n"))
+                return None
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                continue
+            try:
+                chunk = os.read(self.fd, 65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                raise SessionClosedError(f"Shell session '{self.name}' has exited.")
+
+            pending += chunk
+            match = _SENTINEL_RE.search(pending)
+            output = pending[: match.start()] if match else pending[:-128]
+            pending = pending[len(output) :]
+            if output:
+                output = output.replace(b"\r\n", b"\n")
+                if buffer is not None:
+                    buffer.write(output)
+                if console is not None:
+                    console.write(decoder.decode(output))
+                    console.flush()
+            if match:
+                pending = pending[match.end() :]
+                if match.group(1).decode() == token:
+                    return int(match.group(2))
+
+    def run(
+        self, cmd: str, timeout: float | None = DEFAULT_TIMEOUT
+    ) -> tuple[str, int | None]:
+        """Run a command in the session.
+
+        Stdin is redirected from /dev/null so commands cannot consume the
+        sentinel. On timeout the command is interrupted with Ctrl-C.
+
+        Returns:
+            Tuple of the (possibly truncated) output and the exit status, which
+            is None if the command timed out.
+        """
+        with self.lock:
+            buffer = OutputBuffer()
+            token = self._send(f"{{\n{cmd}\n}} < /dev/null")
+            status = self._wait_for_sentinel(token, timeout, buffer)
+            if status is None:
+                os.write(self.fd, b"\x03")
+                # The interrupt flushes queued input, so ask for a fresh sentinel
+                token = self._send("")
+                if self._wait_for_sentinel(token, SESSION_SETUP_TIMEOUT) is None:
+                    self.close()
+                    raise SessionClosedError(
+                        f"Shell session '{self.name}' did not recover from the "
+                        "timeout and was closed."
+                    )
+            return buffer.getvalue(), status
+
+    def close(self):
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            os.close(self.fd)
+            os.waitpid(self.pid, 0)
+        except OSError:
+            pass
+
+
+class SessionRegistry:
+    """The shell sessions of one agent, by name."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+        _registries.add(self)
+
+    def get(self, name: str) -> ShellSession:
+        """Return the named session, starting it if it is not open."""
+        with self.lock:
+            session = self.sessions.get(name)
+            if session is None:
+                if len(self.sessions) >= MAX_SESSIONS:
+                    raise RuntimeError(
+                        f"Too many open sessions ({MAX_SESSIONS}); close one first."
+                    )
+                session = self.sessions[name] = ShellSession(name)
+            return session
+
+    def drop(self, name: str) -> ShellSession | None:
+        with self.lock:
+            return self.sessions.pop(name, None)
+
+    def close_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_registries = weakref.WeakSet()
+# Registry of the running agent; see use_sessions
+_registry = ContextVar("session_registry", default=SessionRegistry())
+
+
+@contextmanager
+def use_sessions(registry: SessionRegistry):
+    """Look up the shell sessions used inside this block in registry.
+
+    The registry is held in a context variable, so agents running
+    concurrently in one process each get their own sessions, even under the
+    same name.
+    """
+    token = _registry.set(registry)
+    try:
+        yield
+    finally:
+        _registry.reset(token)
+
+
+def close_all_sessions(everywhere: bool = False):
+    """Close the current agent's shell sessions, or those of every agent if everywhere.
+
+    Called at exit, and between tasks of a batch worker.
+    """
+    registries = list(_registries) if everywhere else [_registry.get()]
+    for registry in registries:
+        registry.close_all()
+
+
+atexit.register(close_all_sessions, everywhere=True)
+
+
+@tool
+def execute_shell_session(
+    cmd: str, session_name: str = "default", timeout: int = DEFAULT_TIMEOUT
+) -> str:
+    """Execute a command in a persistent bash session.
+
+    Unlike execute_shell, the working directory, environment variables,
+    activated virtualenvs and shell functions persist between calls to the
+    same session. Sessions are created on first use. Interactive programs are
+    not supported (stdin is not available).
+
+    Args:
+        cmd: Shell command string to execute.
+        session_name: Name of the session to use. Defaults to "default".
+        timeout: Seconds after which the command is interrupted. Defaults to 600.
+
+    Returns:
+        Command output with return code, or an error message.
+    """
+    if pty is None:
+        return "Error: Shell sessions are not supported on this platform."
+    try:
+        session = _registry.get().get(session_name)
+        output, status = session.run(cmd, timeout=timeout)
+
+        if status is None:
+            output += (
+                f"\nTimed out after {timeout} seconds; the command was interrupted."
+            )
+        elif status != 0:
+            output += f"\nReturn code: {status}"
+        output = output.strip("\n")
+        return output if output else "Command executed successfully with no output."
+
+    except SessionClosedError as e:
+        session = _registry.get().drop(session_name)
+        if session is not None:
+            session.close()
+        return (
+            f"Error: {str(e)} Its state was lost; the next call starts a new session."
+        )
+    except Exception as e:
+        return f"Error executing command in session: {str(e)}"
+
+
+@tool
+def close_shell_session(session_name: str = "default") -> str:
+    """Close a persistent bash session and kill any processes it started.
+
+    Args:
+        session_name: Name of the session to close. Defaults to "default".
+
+    Returns:
+        Success message or error.
+    """
+    registry = _registry.get()
+    session = registry.drop(session_name)
+    if session is None:
+        with registry.lock:
+            names = ", ".join(sorted(registry.sessions)) or "none"
+        return f"Error: No session named '{session_name}'. Open sessions: {names}."
+    session.close()
+    return f"Closed shell session '{session_name}'."
+
+
+session_tools = [
+    execute_shell_session,
+    close_shell_session,
+]
@@ -1,21 +1,142 @@
 import base64
+import itertools
 import mimetypes
-import subprocess
+import os
+import re
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from edit_tools import atomic_write, edit_tools
+from file_index import find_index, index_tools
+from file_walker import Entry, walk
 from gui_tools import gui_tools
+from image_utils import downscale, encode_image, has_alpha, load_image
+from job_tools import job_tools
 from langchain.tools import tool
+from line_index import get_line_index, read_bytes
+from payload_cache import file_key, payload_cache
+from PIL import Image, UnidentifiedImageError
+from process_utils import (
+    DEFAULT_TIMEOUT,
+    arun_streaming,
+    format_result,
+    run_streaming,
+)
+from python_pool import get_pool
+from session_tools import session_tools
+
+# Default number of entries returned by list_directory
+DEFAULT_LIST_LIMIT = 1000
+# Default and maximum number of lines returned by read_text_file
+DEFAULT_LINE_LIMIT = 2000
+MAX_LINE_LIMIT = 10000
+# Lines longer than this are truncated by read_text_file
+MAX_LINE_LENGTH = 2000
+# Default and maximum number of bytes returned by read_text_file in byte mode
+DEFAULT_BYTE_LIMIT = 64 * 1024
+MAX_BYTE_LIMIT = 1024 * 1024
+# Default number of matching lines returned by search_files, files larger than
+# MAX_SEARCH_FILE_SIZE bytes are skipped, and files with a NUL byte in their
+# first SEARCH_BINARY_CHECK_BYTES are treated as binary and skipped
+DEFAULT_SEARCH_RESULTS = 200
+MAX_SEARCH_FILE_SIZE = 16 * 1024 * 1024
+SEARCH_BINARY_CHECK_BYTES = 8192
+# Threads reading and scanning files in search_files, and how many files they
+# may search ahead of the one being reported (work lost when max_results is hit)
+SEARCH_WORKERS = 8
+SEARCH_AHEAD = 4 * SEARCH_WORKERS
+# Largest window read_binary_file returns, and its default hexdump length
+MAX_BINARY_READ = 1024 * 1024
+DEFAULT_HEX_LENGTH = 512
+# Number of archive members listed by read_binary_file in info mode
+MAX_ARCHIVE_MEMBERS = 50
+# Images are downscaled so their longest side is at most IMAGE_MAX_DIM pixels and
+# re-encoded as IMAGE_FORMAT ("jpeg" or "webp"); images with transparency use PNG
+IMAGE_MAX_DIM = 1568
+IMAGE_FORMAT = "jpeg"
+IMAGE_QUALITY = 85
+# Largest grid accepted by read_image_file, and the overlap between tiles as a
+# fraction of the tile size
+MAX_IMAGE_GRID = 4
+TILE_OVERLAP = 0.05
+# File signatures recognized by read_binary_file in info mode
+MAGIC_TYPES = [
+    (b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"GIF8", "GIF image"),
+    (b"%PDF", "PDF document"),
+    (b"PK\x03\x04", "ZIP archive"),
+    (b"\x1f\x8b", "gzip compressed data"),
+    (b"BZh", "bzip2 compressed data"),
+    (b"\xfd7zXZ\x00", "xz compressed data"),
+    (b"7z\xbc\xaf\x27\x1c", "7-zip archive"),
+    (b"\x7fELF", "ELF executable"),
+    (b"\xcf\xfa\xed\xfe", "Mach-O executable"),
+    (b"MZ", "Windows executable"),
+    (b"SQLite format 3\x00", "SQLite database"),
+    (b"\x93NUMPY", "NumPy array"),
+    (b"PAR1", "Parquet file"),
+]
+
+
+def _walk(root: Path, respect_gitignore: bool = True, **options):
+    """walk() answered from the file index when root is indexed."""
+    index = find_index(root) if respect_gitignore else None
+    if index is not None:
+        options.pop("with_stat", None)
+        return index.walk(root, **options)
+    return walk(root, respect_gitignore=respect_gitignore, **options)
+
+
+def _format_entry(entry: Entry, details: bool) -> str:
+    name = f"{entry.path}/" if entry.is_dir else entry.path
+    if not details:
+        return name
+    size = "-" if entry.is_dir or entry.size is None else str(entry.size)
+    mtime = (
+        time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.mtime))
+        if entry.mtime is not None
+        else "-"
+    )
+    return f"{size:>12}  {mtime}  {name}"
 
 
 @tool
-def list_directory(dir_path: str) -> str:
+def list_directory(
+    dir_path: str,
+    recursive: bool = False,
+    max_depth: int = None,
+    pattern: str = None,
+    ignore: list[str] = None,
+    respect_gitignore: bool = True,
+    details: bool = False,
+    offset: int = 0,
+    limit: int = DEFAULT_LIST_LIMIT,
+) -> str:
     """List all files and directories in the specified directory.
 
     Returns a newline-separated list of entries. Directories are marked with
     a trailing slash (e.g., "subdir/"). Entries are sorted alphabetically.
+    In recursive mode entries are listed depth-first as paths relative to
+    dir_path; .git is not descended into and anything matched by .gitignore
+    files is skipped.
 
     Args:
         dir_path: Path to the directory to list (relative or absolute).
+        recursive: List subdirectories recursively. Defaults to False.
+        max_depth: In recursive mode, the deepest level to list (1 = only
+                   dir_path's own entries). Defaults to unlimited.
+        pattern: Optional glob files must match (e.g. "*.py", "src/**/*.ts");
+                 when set, only matching files are listed.
+        ignore: Optional list of globs for files and directories to skip.
+        respect_gitignore: In recursive mode, skip paths ignored by .gitignore.
+        details: Prefix each entry with its size in bytes and modification time.
+        offset: Number of entries to skip, for paging through long listings.
+        limit: Maximum number of entries to return. Defaults to 1000.
 
     Returns:
         Newline-separated list of files and directories, or an error message.
@@ -29,16 +150,27 @@ def list_directory(dir_path: str) -> str:
         if not resolved_path.is_dir():
             return f"Error: '{dir_path}' is not a directory."
 
-        items = []
-        for item in sorted(resolved_path.iterdir()):
-            if item.is_dir():
-                items.append(f"{item.name}/")
-            else:
-                items.append(item.name)
+        entries = _walk(
+            resolved_path,
+            max_depth=max_depth if recursive else 1,
+            include=[pattern] if pattern else None,
+            exclude=ignore,
+            respect_gitignore=recursive and respect_gitignore,
+            with_stat=details,
+        )
+        offset = max(0, offset)
+        page = list(itertools.islice(entries, offset, offset + limit + 1))
+        has_more = len(page) > limit
+        items = [_format_entry(entry, details) for entry in page[:limit]]
 
         if not items:
-            return "Directory is empty."
+            return "Directory is empty." if offset == 0 else "No more entries."
 
+        if has_more:
+            items.append(
+                f"[Showing entries {offset + 1}-{offset + limit}. "
+                f"Use offset={offset + limit} to list more.]"
+            )
         return "\n".join(items)
 
     except PermissionError:
@@ -48,17 +180,33 @@ def list_directory(dir_path: str) -> str:
 
 
 @tool
-def read_text_file(file_path: str) -> str:
+def read_text_file(
+    file_path: str,
+    offset: int = 1,
+    limit: int = DEFAULT_LINE_LIMIT,
+    byte_offset: int = None,
+    byte_limit: int = None,
+    line_numbers: bool = True,
+) -> str:
     """Read and return the contents of a UTF-8 encoded text file.
 
     Suitable for source code, configuration files, markdown, JSON, and other
     text-based formats. Returns an error for binary or non-UTF-8 files.
+    Reads at most `limit` lines starting at line `offset`; use these to page
+    through large files. Alternatively, set byte_offset/byte_limit to read a
+    raw byte range instead of lines.
 
     Args:
         file_path: Path to the text file (relative or absolute).
+        offset: 1-based line number to start reading from. Defaults to 1.
+        limit: Maximum number of lines to return. Defaults to 2000.
+        byte_offset: If set, read from this byte position instead of by line.
+        byte_limit: Number of bytes to read in byte mode. Defaults to 65536.
+        line_numbers: Prefix each line with its line number. Defaults to True.
 
     Returns:
-        The file contents as a string, or an error message.
+        The requested lines or bytes, with a note if more content remains,
+        or an error message.
     """
     try:
         resolved_path = Path(file_path).resolve()
@@ -69,7 +217,43 @@ def read_text_file(file_path: str) -> str:
         if not resolved_path.is_file():
             return f"Error: '{file_path}' is not a file."
 
-        return resolved_path.read_text(encoding="utf-8")
+        if byte_offset is not None or byte_limit is not None:
+            byte_offset = max(0, byte_offset or 0)
+            byte_limit = min(byte_limit or DEFAULT_BYTE_LIMIT, MAX_BYTE_LIMIT)
+            size = resolved_path.stat().st_size
+            data = read_bytes(resolved_path, byte_offset, byte_limit)
+            end = byte_offset + len(data)
+            text = data.decode("utf-8", errors="replace")
+            return f"{text}\n[Bytes {byte_offset}-{end} of {size}.]"
+
+        index = get_line_index(resolved_path)
+        if index.line_count == 0:
+            return ""
+
+        offset = max(1, offset)
+        if offset > index.line_count:
+            return f"Error: Line {offset} is past the end of the file ({index.line_count} lines)."
+
+        lines = []
+        for number, raw in enumerate(
+            index.read_lines(offset, min(max(1, limit), MAX_LINE_LIMIT)), start=offset
+        ):
+            line = raw.decode("utf-8").removesuffix("\r")
+            if len(line) > MAX_LINE_LENGTH:
+                line = (
+                    line[:MAX_LINE_LENGTH]
+                    + f"... [{len(line) - MAX_LINE_LENGTH} characters truncated]"
+                )
+            lines.append(f"{number:>6}\t{line}" if line_numbers else line)
+
+        last = offset + len(lines) - 1
+        text = "\n".join(lines)
+        if offset > 1 or last < index.line_count:
+            text += f"\n[Showing lines {offset}-{last} of {index.line_count}."
+            if last < index.line_count:
+                text += f" Use offset={last + 1} to read more."
+            text += "]"
+        return text
 
     except UnicodeDecodeError:
         return f"Error: '{file_path}' is not a valid text file. Use read_binary_file instead."
@@ -79,18 +263,226 @@ def read_text_file(file_path: str) -> str:
         return f"Error reading file: {str(e)}"
 
 
+def _search_file(
+    path: Path, regex: re.Pattern, context_lines: int, max_matches: int
+) -> list[tuple[bool, str]]:
+    """Search one file, returning (is_match, line) pairs in grep -n format.
+
+    Groups of lines separated by more than the context are split by "--".
+    Files larger than MAX_SEARCH_FILE_SIZE or containing a NUL byte in their
+    first block (binary files) are skipped.
+    """
+    try:
+        if path.stat().st_size > MAX_SEARCH_FILE_SIZE:
+            return []
+        data = path.read_bytes()
+    except OSError:
+        return []
+    if b"\0" in data[:SEARCH_BINARY_CHECK_BYTES]:
+        return []
+    text = data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+    # Searching the whole text once rejects non-matching files without
+    # splitting them into lines. In multiline mode ^ and $ match at line
+    # boundaries, as they do when searching single lines; \A and \Z do not
+    if "\\A" in regex.pattern or "\\Z" in regex.pattern:
+        prefilter = None
+    else:
+        prefilter = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+    if prefilter is not None and not prefilter.search(text):
+        return []
+
+    # Split on "\n" only, like read_text_file, so line numbers agree with it
+    lines = text.split("\n")
+    if text.endswith("\n"):
+        lines.pop()
+    output = []
+    matches = 0
+    last_printed = -1
+    for i, line in enumerate(lines):
+        if not regex.search(line):
+            continue
+        start = max(i - context_lines, last_printed + 1)
+        if context_lines and output and start > last_printed + 1:
+            output.append((False, "--"))
+        for j in range(start, min(i + context_lines, len(lines) - 1) + 1):
+            is_match = j == i or (j > i and regex.search(lines[j]) is not None)
+            separator = ":" if is_match else "-"
+            content = lines[j]
+            if len(content) > MAX_LINE_LENGTH:
+                content = content[:MAX_LINE_LENGTH] + "..."
+            output.append((is_match, f"{path}{separator}{j + 1}{separator}{content}"))
+            last_printed = j
+            if is_match:
+                matches += 1
+                if matches >= max_matches:
+                    return output
+    return output
+
+
+@tool
+def search_files(
+    pattern: str,
+    path: str = ".",
+    glob: str = None,
+    ignore_case: bool = False,
+    context_lines: int = 0,
+    max_results: int = DEFAULT_SEARCH_RESULTS,
+) -> str:
+    """Search file contents for a regular expression, like grep -rn.
+
+    Searches a single file, or every file under a directory except binary
+    files, .git and paths ignored by .gitignore. Prefer this over running grep
+    through execute_shell.
+
+    Args:
+        pattern: Python regular expression to search for.
+        path: File or directory to search (relative or absolute). Defaults to ".".
+        glob: Only search files matching this glob (e.g. "*.py" or "src/**/*.ts").
+        ignore_case: Match case-insensitively. Defaults to False.
+        context_lines: Lines of context to show before and after each match. Defaults to 0.
+        max_results: Maximum number of matching lines to return. Defaults to 200.
+
+    Returns:
+        Matching lines as "path:line:text" (context lines as "path-line-text"),
+        or an error message.
+    """
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    except re.error as e:
+        return f"Error: Invalid regular expression: {str(e)}"
+
+    try:
+        resolved_path = Path(path).resolve()
+
+        if not resolved_path.exists():
+            return f"Error: Path '{path}' does not exist."
+
+        if resolved_path.is_file():
+            files = iter([resolved_path])
+        else:
+            files = (
+                resolved_path / entry.path
+                for entry in _walk(resolved_path, include=[glob] if glob else None)
+                if not entry.is_dir
+            )
+
+        max_results = max(1, max_results)
+        context_lines = max(0, context_lines)
+        output = []
+        matches = 0
+        searched = 0
+        executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+        pending = deque()
+
+        def queue_next_file():
+            file_path = next(files, None)
+            if file_path is not None:
+                pending.append(
+                    executor.submit(
+                        _search_file, file_path, regex, context_lines, max_results
+                    )
+                )
+
+        try:
+            # Results are taken in walk order, so output is deterministic. Only
+            # SEARCH_AHEAD files are queued at a time, so stopping early is cheap
+            for _ in range(SEARCH_AHEAD):
+                queue_next_file()
+            while pending:
+                file_output = pending.popleft().result()
+                searched += 1
+                queue_next_file()
+                if not file_output:
+                    continue
+                if context_lines and output:
+                    output.append("--")
+                for is_match, line in file_output:
+                    output.append(line)
+                    matches += is_match
+                    if matches >= max_results:
+                        break
+                if matches >= max_results:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if not output:
+            return f"No matches for '{pattern}' in {searched} files."
+        if matches >= max_results:
+            output.append(
+                f"[Stopped after {max_results} matches. Narrow the pattern, path or glob, or raise max_results.]"
+            )
+        return "\n".join(output)
+
+    except PermissionError:
+        return f"Error: Permission denied to access '{path}'."
+    except Exception as e:
+        return f"Error searching files: {str(e)}"
+
+
+def _hexdump(data: bytes, start: int) -> str:
+    """Format bytes like `xxd`: offset, 16 hex bytes and printable ASCII per line."""
+    rows = []
+    for pos in range(0, len(data), 16):
+        row = data[pos : pos + 16]
+        hex_part = " ".join(row[i : i + 2].hex() for i in range(0, len(row), 2))
+        ascii_part = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+        rows.append(f"{start + pos:08x}: {hex_part:<39}  {ascii_part}")
+    return "\n".join(rows)
+
+
+def _describe_binary(path: Path, size: int) -> str:
+    """Summarize a binary file: size, detected type, archive contents and header bytes."""
+    head = read_bytes(path, 0, 64)
+    kind = next(
+        (name for magic, name in MAGIC_TYPES if head.startswith(magic)),
+        mimetypes.guess_type(str(path))[0] or "unknown",
+    )
+    lines = [f"File: {path.name}", f"Size: {size} bytes", f"Type: {kind}"]
+
+    members = None
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            infos = archive.infolist()
+            members = [f"{i.file_size:>12}  {i.filename}" for i in infos]
+    elif kind != "unknown" and tarfile.is_tarfile(path):
+        with tarfile.open(path) as archive:
+            members = [
+                f"{m.size:>12}  {m.name}"
+                for m in itertools.islice(archive, MAX_ARCHIVE_MEMBERS + 1)
+            ]
+    if members is not None:
+        lines.append(
+            f"Archive members{' (first shown)' if len(members) > MAX_ARCHIVE_MEMBERS else ''}:"
+        )
+        lines.extend(members[:MAX_ARCHIVE_MEMBERS])
+
+    lines.append("Header:")
+    lines.append(_hexdump(head, 0))
+    return "\n".join(lines)
+
+
 @tool
-def read_binary_file(file_path: str) -> str:
+def read_binary_file(
+    file_path: str, offset: int = 0, length: int = None, mode: str = "base64"
+) -> str:
     """Read a binary file and return its contents as a base64-encoded string.
 
     Handles any file type including executables, archives, and data files.
-    The output can be decoded using standard base64 decoding.
+    The base64 output can be decoded using standard base64 decoding. Reads are
+    limited to 1 MB; read larger files in chunks with offset/length, or start
+    with mode='info' to see what the file contains.
 
     Args:
         file_path: Path to the binary file (relative or absolute).
+        offset: Byte position to start reading from. Defaults to 0.
+        length: Number of bytes to read. Defaults to the rest of the file
+                (base64) or 512 bytes (hex).
+        mode: 'base64' for raw contents, 'hex' for a hexdump, or 'info' for
+              size, detected type, archive listing and header bytes.
 
     Returns:
-        Base64-encoded file contents, or an error message.
+        Base64-encoded contents, hexdump or file summary, or an error message.
     """
     try:
         resolved_path = Path(file_path).resolve()
@@ -101,8 +493,45 @@ def read_binary_file(file_path: str) -> str:
         if not resolved_path.is_file():
             return f"Error: '{file_path}' is not a file."
 
-        binary_data = resolved_path.read_bytes()
-        return base64.b64encode(binary_data).decode("utf-8")
+        size = resolved_path.stat().st_size
+        offset = max(0, offset)
+
+        if mode not in ("base64", "hex", "info"):
+            return f"Error: Unknown mode '{mode}'. Use 'base64', 'hex' or 'info'."
+
+        if length is not None and length < 0:
+            return "Error: length must be non-negative."
+        if mode != "info" and offset > 0 and offset >= size:
+            return f"Error: Offset {offset} is past the end of the file ({size} bytes)."
+
+        cache_key = file_key(resolved_path, "binary", mode, offset, length)
+        cached = payload_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if mode == "info":
+            result = _describe_binary(resolved_path, size)
+            payload_cache.put(cache_key, result)
+            return result
+
+        if length is None:
+            length = size - offset if mode == "base64" else DEFAULT_HEX_LENGTH
+        if length > MAX_BINARY_READ:
+            return (
+                f"Error: Requested {length} bytes of '{file_path}' ({size} bytes in "
+                f"total), more than the {MAX_BINARY_READ} byte limit. Use offset and "
+                "length to read it in chunks, or mode='info' for a summary."
+            )
+
+        data = read_bytes(resolved_path, offset, length)
+        if mode == "hex":
+            if not data:
+                return f"No bytes at offset {offset} (file size {size})."
+            result = _hexdump(data, offset)
+        else:
+            result = base64.b64encode(data).decode("utf-8")
+        payload_cache.put(cache_key, result)
+        return result
 
     except PermissionError:
         return f"Error: Permission denied to read '{file_path}'."
@@ -110,17 +539,86 @@ def read_binary_file(file_path: str) -> str:
         return f"Error reading binary file: {str(e)}"
 
 
+def _image_content(path: Path, grid: int) -> list | None:
+    """Decode, orient, downscale and re-encode an image, optionally split into tiles.
+
+    Returns None when the file can be sent unchanged: a single upright image in
+    a common format that is already small enough.
+    """
+    with Image.open(path) as probe:
+        if (
+            grid == 1
+            and probe.format in ("JPEG", "PNG", "WEBP")
+            and max(probe.size) <= IMAGE_MAX_DIM
+            and probe.getexif().get(0x0112, 1) == 1
+        ):
+            return None
+
+    # Tiles need full detail; a single overview can be decoded at reduced scale
+    image, (width, height) = load_image(path, IMAGE_MAX_DIM if grid == 1 else None)
+
+    if has_alpha(image):
+        fmt = "png"
+    else:
+        fmt = IMAGE_FORMAT
+        image = image.convert("RGB") if image.mode not in ("RGB", "L") else image
+
+    overview = downscale(image, IMAGE_MAX_DIM)
+    content = [
+        {
+            "type": "text",
+            "text": f"Image: {path.name} ({width}x{height}, "
+            f"shown at {overview.width}x{overview.height})",
+        },
+        encode_image(overview, fmt=fmt, quality=IMAGE_QUALITY),
+    ]
+    if grid == 1:
+        return content
+
+    scale_x, scale_y = width / image.width, height / image.height
+    tile_w, tile_h = image.width / grid, image.height / grid
+    pad_x, pad_y = tile_w * TILE_OVERLAP, tile_h * TILE_OVERLAP
+    for row in range(grid):
+        for col in range(grid):
+            box = (
+                max(0, round(col * tile_w - pad_x)),
+                max(0, round(row * tile_h - pad_y)),
+                min(image.width, round((col + 1) * tile_w + pad_x)),
+                min(image.height, round((row + 1) * tile_h + pad_y)),
+            )
+            left, top, right, bottom = (
+                round(box[0] * scale_x),
+                round(box[1] * scale_y),
+                round(box[2] * scale_x),
+                round(box[3] * scale_y),
+            )
+            content.append(
+                {
+                    "type": "text",
+                    "text": f"Tile row {row + 1}, column {col + 1}: "
+                    f"pixels ({left}, {top}) to ({right}, {bottom})",
+                }
+            )
+            tile = downscale(image.crop(box), IMAGE_MAX_DIM)
+            content.append(encode_image(tile, fmt=fmt, quality=IMAGE_QUALITY))
+    return content
+
+
 @tool
-def read_image_file(file_path: str) -> list:
+def read_image_file(file_path: str, grid: int = 1) -> list:
     """Read an image file and return it in a format suitable for visual analysis.
 
     Use this tool to understand the image content and semantics.
 
     Supports PNG, JPG, JPEG, GIF, and WebP formats. Returns the image as a
     base64-encoded payload with MIME type metadata for multimodal processing.
+    Large images are downscaled; to see fine detail such as small text in a
+    large image, split it into a grid of tiles, each sent at full detail.
 
     Args:
         file_path: Path to the image file (relative or absolute).
+        grid: Split the image into grid x grid tiles (in addition to an
+              overview image). Defaults to 1 (no tiling); at most 4.
 
     Returns:
         List containing image metadata and base64 data, or an error message.
@@ -145,17 +643,42 @@ def read_image_file(file_path: str) -> list:
                 }
             ]
 
-        image_data = base64.b64encode(resolved_path.read_bytes()).decode("utf-8")
+        grid = max(1, min(grid, MAX_IMAGE_GRID))
+        cache_key = file_key(
+            resolved_path, "image", grid, IMAGE_MAX_DIM, IMAGE_FORMAT, IMAGE_QUALITY
+        )
+        content = payload_cache.get(cache_key)
+        if content is not None:
+            return content
+
+        try:
+            content = _image_content(resolved_path, grid)
+        except UnidentifiedImageError:
+            # Formats Pillow cannot decode (e.g. SVG) are sent unchanged
+            content = None
+        except Image.DecompressionBombError as e:
+            return [
+                {
+                    "type": "text",
+                    "text": f"Error: '{file_path}' is too large to decode: {e} "
+                    "Crop or downscale it with execute_python first.",
+                }
+            ]
 
-        return [
-            {"type": "text", "text": f"Image: {resolved_path.name}"},
-            {
-                "type": "image",
-                "source_type": "base64",
-                "data": image_data,
-                "mime_type": mime_type,
-            },
-        ]
+        if content is None:
+            image_data = base64.b64encode(resolved_path.read_bytes()).decode("utf-8")
+            content = [
+                {"type": "text", "text": f"Image: {resolved_path.name}"},
+                {
+                    "type": "image",
+                    "source_type": "base64",
+                    "data": image_data,
+                    "mime_type": mime_type,
+                },
+            ]
+
+        payload_cache.put(cache_key, content)
+        return content
 
     except PermissionError:
         return [
@@ -166,26 +689,61 @@ def read_image_file(file_path: str) -> list:
 
 
 @tool
-def write_file(file_path: str, content: str) -> str:
-    """Write text content to a file, creating it if it doesn't exist.
-
-    Overwrites existing files. Automatically creates parent directories
-    as needed. Content is written with UTF-8 encoding.
+def write_file(
+    file_path: str,
+    content: str,
+    mode: str = "overwrite",
+    encoding: str = "utf-8",
+    fsync: bool = False,
+) -> str:
+    """Write or append text (or base64-encoded binary) content to a file.
+
+    Creates the file if it doesn't exist and overwrites it otherwise.
+    Automatically creates parent directories as needed. To change part of an
+    existing file, use replace_in_file, replace_lines or apply_patch instead.
+    Overwrites are atomic: the file never appears half-written. Use append
+    mode to build large outputs piece by piece instead of rewriting them.
 
     Args:
         file_path: Destination path for the file (relative or absolute).
         content: Text content to write to the file.
+        mode: "overwrite" (default) replaces the file, "append" adds to its end.
+        encoding: "utf-8" (default) writes content as text; "base64" decodes
+                  content and writes the resulting bytes (for binary files).
+        fsync: Flush the file to disk before returning. Only needed when the
+               data must survive a machine crash. Defaults to False.
 
     Returns:
         Success confirmation message, or an error message.
     """
     try:
+        if mode not in ("overwrite", "append"):
+            return f"Error: Invalid mode '{mode}'. Use 'overwrite' or 'append'."
+        if encoding == "utf-8":
+            data = content.encode("utf-8")
+        elif encoding == "base64":
+            try:
+                data = base64.b64decode(content, validate=True)
+            except ValueError:
+                return "Error: content is not valid base64."
+        else:
+            return f"Error: Invalid encoding '{encoding}'. Use 'utf-8' or 'base64'."
+
         resolved_path = Path(file_path).resolve()
 
         resolved_path.parent.mkdir(parents=True, exist_ok=True)
 
-        resolved_path.write_text(content, encoding="utf-8")
-        return f"Successfully written to '{file_path}'."
+        if mode == "append":
+            with open(resolved_path, "ab") as f:
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                size = f.tell()
+            return f"Appended {len(data)} bytes to '{file_path}' ({size} bytes total)."
+
+        atomic_write(resolved_path, data, fsync=fsync)
+        return f"Successfully written to '{file_path}' ({len(data)} bytes)."
 
     except PermissionError:
         return f"Error: Permission denied to write to '{file_path}'."
@@ -194,87 +752,111 @@ def write_file(file_path: str, content: str) -> str:
 
 
 @tool
-def execute_shell(cmd: str) -> str:
+def execute_shell(cmd: str, timeout: int = DEFAULT_TIMEOUT) -> str:
     """Execute a shell command.
 
-    Runs the command in a shell environment.
-    Captures and returns both stdout and stderr streams.
+    Runs the command in a shell environment with a wall-clock timeout.
+    Captures and returns both stdout and stderr streams; very long output is
+    truncated in the middle. Stdin is not available to the command.
 
     Args:
         cmd: Shell command string to execute.
+        timeout: Seconds after which the command is killed. Defaults to 600.
 
     Returns:
         Combined stdout/stderr output with return code, or an error message.
     """
     try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-        )
+        result = run_streaming(cmd, shell=True, timeout=timeout)
+        output = format_result(result, timeout)
+        return output if output else "Command executed successfully with no output."
 
-        output = ""
-        if result.stdout:
-            output += f"STDOUT:\n{result.stdout}"
-        if result.stderr:
-            if output:
-                output += "\n"
-            output += f"STDERR:\n{result.stderr}"
-        if result.returncode != 0:
-            if output:
-                output += "\n"
-            output += f"Return code: {result.returncode}"
+    except Exception as e:
+        return f"Error executing command: {str(e)}"
 
+
+async def _aexecute_shell(cmd: str, timeout: int = DEFAULT_TIMEOUT) -> str:
+    try:
+        result = await arun_streaming(cmd, shell=True, timeout=timeout)
+        output = format_result(result, timeout)
         return output if output else "Command executed successfully with no output."
 
     except Exception as e:
         return f"Error executing command: {str(e)}"
 
 
+# Used by ainvoke, so the async runtime awaits commands without blocking a thread
+execute_shell.coroutine = _aexecute_shell
+
+
+def _check_python_file(resolved_path: Path, file_path: str) -> str | None:
+    """Return an error message if the path is not an existing .py file."""
+    if not resolved_path.exists():
+        return f"Error: File '{file_path}' does not exist."
+    if not resolved_path.is_file():
+        return f"Error: '{file_path}' is not a file."
+    if resolved_path.suffix != ".py":
+        return f"Error: '{file_path}' is not a Python file."
+    return None
+
+
 @tool
-def execute_python(file_path: str) -> str:
+def execute_python(
+    file_path: str, timeout: int = DEFAULT_TIMEOUT, fresh_process: bool = False
+) -> str:
     """Execute a Python script.
 
-    Runs the specified .py file using the Python interpreter.
-    Captures and returns both stdout and stderr streams.
+    Runs the specified .py file using the Python interpreter with a wall-clock
+    timeout. Captures and returns both stdout and stderr streams; very long
+    output is truncated in the middle. Scripts normally run in a pre-started
+    interpreter with common modules (numpy, pandas) already imported; each
+    script still gets its own process.
 
     Args:
         file_path: Path to the Python script (relative or absolute).
+        timeout: Seconds after which the script is killed. Defaults to 600.
+        fresh_process: If True, start a new interpreter instead of using a
+                       pre-started one (e.g. for scripts using multiprocessing
+                       or relying on freshly installed package versions).
 
     Returns:
         Combined stdout/stderr output with return code, or an error message.
     """
     try:
         resolved_path = Path(file_path).resolve()
-
-        if not resolved_path.exists():
-            return f"Error: File '{file_path}' does not exist."
-
-        if not resolved_path.is_file():
-            return f"Error: '{file_path}' is not a file."
-
-        if resolved_path.suffix != ".py":
-            return f"Error: '{file_path}' is not a Python file."
-
-        result = subprocess.run(
-            ["python", str(resolved_path)],
-            capture_output=True,
-            text=True,
+        error = _check_python_file(resolved_path, file_path)
+        if error:
+            return error
+
+        pool = None if fresh_process else get_pool()
+        result = pool.run(resolved_path, timeout=timeout) if pool else None
+        if result is None:
+            result = run_streaming(["python", str(resolved_path)], timeout=timeout)
+        output = format_result(result, timeout)
+        return (
+            output if output else "Python script executed successfully with no output."
         )
 
-        output = ""
-        if result.stdout:
-            output += f"STDOUT:\n{result.stdout}"
-        if result.stderr:
-            if output:
-                output += "\n"
-            output += f"STDERR:\n{result.stderr}"
-        if result.returncode != 0:
-            if output:
-                output += "\n"
-            output += f"Return code: {result.returncode}"
+    except Exception as e:
+        return f"Error executing Python file: {str(e)}"
+
 
+async def _aexecute_python(
+    file_path: str, timeout: int = DEFAULT_TIMEOUT, fresh_process: bool = False
+) -> str:
+    try:
+        resolved_path = Path(file_path).resolve()
+        error = _check_python_file(resolved_path, file_path)
+        if error:
+            return error
+
+        pool = None if fresh_process else get_pool()
+        result = await pool.arun(resolved_path, timeout=timeout) if pool else None
+        if result is None:
+            result = await arun_streaming(
+                ["python", str(resolved_path)], timeout=timeout
+            )
+        output = format_result(result, timeout)
         return (
             output if output else "Python script executed successfully with no output."
         )
@@ -283,12 +865,22 @@ def execute_python(file_path: str) -> str:
         return f"Error executing Python file: {str(e)}"
 
 
-tools = [
-    list_directory,
-    read_text_file,
-    read_binary_file,
-    read_image_file,
-    write_file,
-    execute_shell,
-    execute_python,
-] + gui_tools
+execute_python.coroutine = _aexecute_python
+
+tools = (
+    [
+        list_directory,
+        read_text_file,
+        search_files,
+        read_binary_file,
+        read_image_file,
+        write_file,
+        execute_shell,
+        execute_python,
+    ]
+    + edit_tools
+    + session_tools
+    + job_tools
+    + index_tools
+    + gui_tools
+)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# giazero's modules import each other by bare name, as when run as scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "giazero"))
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("pyautogui")
+pytest.importorskip("langgraph.checkpoint.sqlite")
+
+import agent  # noqa: E402
+import file_index  # noqa: E402
+from langchain_core.language_models.fake_chat_models import (  # noqa: E402
+    FakeMessagesListChatModel,
+)
+from langchain_core.messages import AIMessage  # noqa: E402
+
+
+class FakeModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def test_build_agent_indexes_new_solution_dir(tmp_path, monkeypatch):
+    task_dir = tmp_path / "task"
+    task_dir.mkdir()
+    solution_dir = tmp_path / "out" / "solution"
+    monkeypatch.setattr(
+        agent,
+        "init_chat_model",
+        lambda model, cache=None: FakeModel(
+            responses=[AIMessage("done")], profile={"max_input_tokens": 100000}
+        ),
+    )
+
+    built = agent.build_agent(task_dir, solution_dir, "fake")
+    try:
+        assert solution_dir.is_dir()
+        index = file_index.find_index(solution_dir)
+        assert index is not None and index.root == solution_dir.resolve()
+
+        (solution_dir / "answer.txt").write_text("42")
+        assert index.take_changes() == {"answer.txt": "added"}
+    finally:
+        del built
+        file_index.stop_file_index()